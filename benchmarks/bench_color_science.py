@@ -0,0 +1,51 @@
+# match every pixel of 500x500 images against a 500 color chart with get_nearest_colors (CIE76, and CIEDE2000 with the
+# approximate search; the exact one takes seconds at this size) and a 32 color palette (exact CIEDE2000).
+# accuracy is checked on a sample of pixels against the full difference matrix
+# usage: python -m benchmarks.bench_color_science [image ...]
+
+import sys
+import numpy as np
+from crochet_tools.core import rgb_to_lab, get_delta_e_matrix, get_nearest_colors
+from benchmarks.common import get_test_image_paths, load_test_image, time_call, print_table
+
+image_size = 500
+chart_size = 500
+palette_size = 32
+sample_step = 53 # every sample_step-th pixel is checked against the full difference matrix
+
+def main(argv):
+    image_paths = argv[1:] if len(argv) > 1 else get_test_image_paths()
+    rng = np.random.default_rng(0)
+    chart = rng.integers(0, 256, (chart_size, 3), dtype=np.uint8)
+    palette = rng.integers(0, 256, (palette_size, 3), dtype=np.uint8)
+    # column name, targets, metric, approximate
+    searches = [
+        ("cie76", chart, "cie76", False),
+        ("ciede2000 approximate", chart, "ciede2000", True),
+        (f"ciede2000 {palette_size} colors", palette, "ciede2000", False),
+    ]
+
+    rows = []
+    worst_seconds = 0
+    for image_path in image_paths:
+        pixels = np.asarray(load_test_image(image_path).resize((image_size, image_size)))
+        num_unique = len(np.unique(pixels.reshape(-1, 3), axis=0))
+        row = [image_path, num_unique]
+        for _, targets, metric, approximate in searches:
+            seconds, nearest = time_call(get_nearest_colors, pixels, targets, metric, approximate)
+            worst_seconds = max(worst_seconds, seconds)
+            sample = pixels.reshape(-1, 3)[::sample_step]
+            differences = get_delta_e_matrix(rgb_to_lab(sample), rgb_to_lab(targets), metric)
+            found = differences[np.arange(len(sample)), nearest.reshape(-1)[::sample_step]]
+            row += [f"{seconds * 1000:.0f}", f"{np.mean(found == differences.min(axis=1)) * 100:.2f}%"]
+        rows.append(row)
+
+    print(f"{image_size}x{image_size} images against a {chart_size} color chart and a {palette_size} color palette")
+    columns = ["image", "distinct colors"]
+    for name, _, _, _ in searches:
+        columns += [f"{name} ms", f"{name} exact"]
+    print_table(columns, rows)
+    print(f"slowest: {worst_seconds * 1000:.0f} ms")
+
+if __name__ == "__main__":
+    main(sys.argv)
@@ -0,0 +1,45 @@
+# compare the original chained ImageEnhance color sliders against the fused apply_color_sliders
+# usage: python -m benchmarks.bench_color_sliders [image]
+
+import sys
+import numpy as np
+from PIL import ImageEnhance
+from crochet_tools.core import apply_color_sliders
+from benchmarks.common import get_test_image_paths, load_test_image, time_call, print_table
+
+slider_settings = [(1.0, 1.0, 1.0), (1.3, 1.0, 1.0), (1.0, 1.5, 1.0), (1.0, 1.0, 1.8), (0.6, 1.4, 0.4), (1.8, 0.3, 2.0), (0.2, 2.0, 1.5)]
+
+# the original implementation, kept here as the baseline
+def apply_color_sliders_legacy(image, brightness, contrast, saturation):
+    img = image.copy()
+    img = ImageEnhance.Brightness(img).enhance(brightness)
+    img = ImageEnhance.Contrast(img).enhance(contrast)
+    img = ImageEnhance.Color(img).enhance(saturation)
+    return img
+
+def main(argv):
+    image_paths = argv[1:] if len(argv) > 1 else get_test_image_paths()
+
+    rows = []
+    max_difference = 0
+    for image_path in image_paths:
+        image = load_test_image(image_path)
+        legacy_total = 0
+        fused_total = 0
+        image_max_difference = 0
+        for settings in slider_settings:
+            legacy_time, legacy_result = time_call(apply_color_sliders_legacy, image, *settings)
+            fused_time, fused_result = time_call(apply_color_sliders, image, *settings)
+            legacy_total += legacy_time
+            fused_total += fused_time
+            difference = np.abs(np.asarray(legacy_result, dtype=np.int16) - np.asarray(fused_result, dtype=np.int16)).max()
+            image_max_difference = max(image_max_difference, int(difference))
+        max_difference = max(max_difference, image_max_difference)
+        rows.append([image_path, f"{image.width}x{image.height}", f"{legacy_total / len(slider_settings) * 1000:.1f}", f"{fused_total / len(slider_settings) * 1000:.1f}", f"{legacy_total / fused_total:.1f}x", image_max_difference])
+
+    print(f"color sliders, mean of {len(slider_settings)} settings per image")
+    print_table(["image", "size", "legacy ms", "fused ms", "speedup", "max difference"], rows)
+    print(f"max difference across all images: {max_difference}")
+
+if __name__ == "__main__":
+    main(sys.argv)
@@ -0,0 +1,45 @@
+# compare the openpyxl and direct ooxml export backends, and check that each file imports back pixel-identically
+# usage: python -m benchmarks.bench_export [image] [colors]
+
+import sys
+import contextlib
+import io
+import numpy as np
+from tempfile import TemporaryDirectory
+from crochet_tools.core import pixelate_image, quantize_to_pattern, export_image_as_excel_pattern, import_pattern_from_excel, export_backends, get_column
+from benchmarks.common import load_test_image, time_call, print_table
+
+sizes = [75, 150, 300, 500]
+
+def export_quietly(output_directory, pattern, backend):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return export_image_as_excel_pattern(output_directory, backend, pattern, include_pixel_numbers=True, include_row_numbers=True, backend=backend)
+
+def import_quietly(file_path, pattern):
+    # the image starts in column B because of the row numbers column
+    end_cell = get_column(pattern.width + 1) + str(pattern.height)
+    with contextlib.redirect_stdout(io.StringIO()):
+        return import_pattern_from_excel(file_path, "B1", end_cell)
+
+def main(argv):
+    image_path = argv[1] if len(argv) > 1 else "test_images/lenna.png"
+    num_colors = int(argv[2]) if len(argv) > 2 else 32
+    source = load_test_image(image_path)
+
+    rows = []
+    with TemporaryDirectory() as output_directory:
+        for size in sizes:
+            pattern = quantize_to_pattern(pixelate_image(source, size, size), num_colors)
+            times = {}
+            for backend in export_backends:
+                times[backend], success = time_call(export_quietly, output_directory, pattern, backend, repeat=1)
+                imported = import_quietly(f"{output_directory}/{backend}.xlsx", pattern)
+                round_trip = success and imported != None and np.array_equal(imported.to_rgb_array(), pattern.to_rgb_array())
+                times[backend + " round trip"] = round_trip
+            rows.append([f"{size}x{size}", f"{times['openpyxl']:.2f}", f"{times['ooxml']:.2f}", f"{times['openpyxl'] / times['ooxml']:.1f}x", times["openpyxl round trip"], times["ooxml round trip"]])
+
+    print(f"export of {image_path} with {num_colors} colors (seconds)")
+    print_table(["size", "openpyxl", "ooxml", "speedup", "openpyxl round trip", "ooxml round trip"], rows)
+
+if __name__ == "__main__":
+    main(sys.argv)
@@ -0,0 +1,52 @@
+# compare the original per-pixel get_colors loop against the vectorized get_color_arrays on every image in test_images/
+# usage: python -m benchmarks.bench_get_colors [stitches] [colors]
+
+import sys
+from crochet_tools.core import pixelate_image, quantize_image, get_color_arrays, get_colors
+from benchmarks.common import get_test_image_paths, load_test_image, time_call, print_table
+
+# the original implementation, kept here as the baseline
+def get_colors_legacy(image):
+    used_colors = []
+    colors = []
+    color_map = []
+
+    for x in range(0, image.size[0]): # Left column to right column
+        column_colors = []
+        column_map = []
+        for y in range(0, image.size[1]): # Top row to bottom row
+            pixel_color = image.getpixel((x,y))
+            if(pixel_color not in used_colors):
+                used_colors.append(pixel_color)
+            pixel_map = used_colors.index(pixel_color)
+
+            column_colors.append(pixel_color)
+            column_map.append(pixel_map)
+        colors.append(column_colors)
+        color_map.append(column_map)
+
+    return colors, color_map
+
+def main(argv):
+    stitches = int(argv[1]) if len(argv) > 1 else 300
+    num_colors = int(argv[2]) if len(argv) > 2 else 8
+
+    rows = []
+    total_legacy = 0
+    total_vectorized = 0
+    for image_path in get_test_image_paths():
+        pattern = quantize_image(pixelate_image(load_test_image(image_path), stitches, stitches), num_colors)
+        legacy_time, legacy_result = time_call(get_colors_legacy, pattern, repeat=1)
+        vectorized_time, _ = time_call(get_color_arrays, pattern)
+        # the compatibility view must match the original output exactly
+        matches = get_colors(pattern) == legacy_result
+        total_legacy += legacy_time
+        total_vectorized += vectorized_time
+        rows.append([image_path, f"{legacy_time * 1000:.1f}", f"{vectorized_time * 1000:.2f}", f"{legacy_time / vectorized_time:.0f}x", matches])
+
+    print(f"get_colors on {stitches}x{stitches} patterns with {num_colors} colors")
+    print_table(["image", "legacy ms", "vectorized ms", "speedup", "identical"], rows)
+    print(f"total: legacy {total_legacy:.2f} s, vectorized {total_vectorized:.3f} s, speedup {total_legacy / total_vectorized:.0f}x")
+
+if __name__ == "__main__":
+    main(sys.argv)
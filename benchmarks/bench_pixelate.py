@@ -0,0 +1,48 @@
+# compare the pixelation methods on speed (ms) and quality, plus the original plain resize as the baseline
+# quality: mean CIE76 difference from the exact area average (how true each stitch's color is to the area it covers)
+# and the mean number of distinct stitch colors (fewer means fewer in between shades at edges for the quantizer)
+# speed is measured on each test image as is, and scaled up to large_megapixels like a photo straight off a phone
+# usage: python -m benchmarks.bench_pixelate [image ...]
+
+import sys
+from statistics import mean
+import numpy as np
+from PIL import Image
+from crochet_tools.core import pixelation_methods, pixelate, get_mean_delta_e
+from benchmarks.common import get_test_image_paths, load_test_image, time_call, print_table
+
+grid_size = 75
+large_megapixels = 12
+
+# the original implementation, kept here as the baseline
+def pixelate_legacy(image, width, height):
+    return image.resize((width, height))
+
+def get_distinct_colors(image):
+    return len(np.unique(np.asarray(image).reshape(-1, 3), axis=0))
+
+def main(argv):
+    image_paths = argv[1:] if len(argv) > 1 else get_test_image_paths()
+    methods = dict(pixelation_methods, legacy=pixelate_legacy)
+
+    # method -> list of (ms, ms at large_megapixels, delta e from area, distinct colors) over all images
+    results = {name: [] for name in methods}
+    for image_path in image_paths:
+        image = load_test_image(image_path)
+        scale = (large_megapixels * 1e6 / (image.width * image.height)) ** 0.5
+        large_image = image.resize((round(image.width * scale), round(image.height * scale)), Image.Resampling.BICUBIC)
+        reference = pixelate(image, grid_size, grid_size, "area")
+        for name, method in methods.items():
+            seconds, pixelated = time_call(method, image, grid_size, grid_size)
+            large_seconds, _ = time_call(method, large_image, grid_size, grid_size)
+            results[name].append((seconds * 1000, large_seconds * 1000, get_mean_delta_e(reference, pixelated), get_distinct_colors(pixelated)))
+
+    rows = []
+    for name, entries in results.items():
+        rows.append([name] + [f"{mean(entry[i] for entry in entries):.{digits}f}" for i, digits in enumerate([1, 1, 2, 0])])
+
+    print(f"pixelation on {len(image_paths)} images to {grid_size}x{grid_size}, mean over images")
+    print_table(["method", "ms", f"ms at {large_megapixels} MP", "delta e from area", "distinct colors"], rows)
+
+if __name__ == "__main__":
+    main(sys.argv)
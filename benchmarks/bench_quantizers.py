@@ -0,0 +1,33 @@
+# compare the quantizer backends on speed (ms) and quality (mean CIE76 difference from the pixelated image)
+# usage: python -m benchmarks.bench_quantizers [image ...]
+
+import sys
+from statistics import mean
+from crochet_tools.core import quantizers, compare_quantizers, pixelate_image
+from benchmarks.common import get_test_image_paths, load_test_image, print_table
+
+grid_size = 150
+color_counts = [2, 8, 32]
+
+def main(argv):
+    image_paths = argv[1:] if len(argv) > 1 else get_test_image_paths()
+
+    # quantizer, num_colors -> list of (seconds, mean delta e) over all images
+    results = {}
+    for image_path in image_paths:
+        pixelated = pixelate_image(load_test_image(image_path), grid_size, grid_size)
+        for num_colors in color_counts:
+            for entry in compare_quantizers(pixelated, num_colors):
+                results.setdefault((entry["quantizer"], num_colors), []).append((entry["seconds"], entry["mean_delta_e"]))
+
+    rows = []
+    for name in quantizers:
+        for num_colors in color_counts:
+            entries = results[(name, num_colors)]
+            rows.append([name, num_colors, f"{mean(s for s, _ in entries) * 1000:.1f}", f"{mean(d for _, d in entries):.2f}"])
+
+    print(f"quantizers on {len(image_paths)} images pixelated to {grid_size}x{grid_size}, mean over images")
+    print_table(["quantizer", "colors", "ms", "mean delta e"], rows)
+
+if __name__ == "__main__":
+    main(sys.argv)
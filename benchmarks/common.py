@@ -0,0 +1,31 @@
+# shared helpers for the scripts in this folder. run benchmarks from the repo root, e.g. python -m benchmarks.bench_get_colors
+
+from glob import glob
+from os import path
+from statistics import median
+from time import perf_counter
+from PIL import Image
+
+test_images_directory = "test_images"
+
+def get_test_image_paths(pattern="*"):
+    return sorted(p for p in glob(path.join(test_images_directory, pattern)) if p.lower().endswith((".jpg", ".jpeg", ".png")))
+
+def load_test_image(image_path):
+    return Image.open(image_path).convert("RGB")
+
+# run func(*args) `repeat` times and return (median seconds, last result)
+def time_call(func, *args, repeat=3):
+    times = []
+    result = None
+    for _ in range(repeat):
+        start = perf_counter()
+        result = func(*args)
+        times.append(perf_counter() - start)
+    return median(times), result
+
+def print_table(header, rows):
+    widths = [max(len(str(row[i])) for row in [header] + rows) for i in range(len(header))]
+    print("  ".join(str(h).ljust(w) for h, w in zip(header, widths)))
+    for row in rows:
+        print("  ".join(str(c).ljust(w) for c, w in zip(row, widths)))
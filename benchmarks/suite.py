@@ -0,0 +1,154 @@
+# benchmark suite: runs every test image through load -> enhance -> pixelate -> quantize -> index -> export -> import
+# for each size and color count, reports the median and percentiles of every stage as json, and compares the medians
+# against a stored baseline
+# usage: python -m benchmarks.suite [--images "*.png"] [--sizes 75 150] [--colors 2 8] [--output report.json]
+#                                   [--baseline benchmarks/baseline.json] [--threshold 0.25] [--min-slowdown 0.002] [--save-baseline]
+# exits with 1 if any round trip failed or any stage median is more than threshold slower than the baseline
+
+import argparse
+import contextlib
+import io
+import json
+import platform
+import sys
+from os import path
+from tempfile import TemporaryDirectory
+from time import perf_counter
+import numpy as np
+from crochet_tools.core import (
+    load_source_image, apply_color_sliders, make_proxy, get_proxy_long_side, pixelate_image, quantize_to_pattern, IndexedPattern,
+    export_image_as_excel_pattern, import_pattern_from_excel, export_backends, get_column,
+)
+from benchmarks.common import get_test_image_paths, print_table
+
+default_sizes = [75, 150, 300, 500]
+default_color_counts = [2, 8, 32]
+default_baseline_path = path.join("benchmarks", "baseline.json")
+default_threshold = 0.25 # a stage regresses when its median is more than 25% slower than the baseline median
+default_min_slowdown = 0.002 # ...and more than this many seconds slower, so timer noise on sub-millisecond stages is not a regression
+slider_settings = (1.1, 1.2, 1.3) # brightness, contrast, saturation used for the enhance stage
+stage_names = ["load", "enhance", "pixelate", "quantize", "index", "export", "import"]
+percentiles = [50, 90, 95, 99]
+
+def timed(stage_times, stage_name, func, *args, **kwargs):
+    start = perf_counter()
+    result = func(*args, **kwargs)
+    stage_times[stage_name] = perf_counter() - start
+    return result
+
+# DESC: run one image through every stage
+# IN: image path, size in stitches (square), number of colors, export backend, output directory
+# OUT: (dict of stage name -> seconds, round trip success)
+def run_case(image_path, size, num_colors, backend, output_directory):
+    stage_times = {}
+    with contextlib.redirect_stdout(io.StringIO()):
+        source = timed(stage_times, "load", load_source_image, image_path).image
+        proxy = make_proxy(source, get_proxy_long_side(source, size, size))
+        enhanced = timed(stage_times, "enhance", apply_color_sliders, proxy, *slider_settings)
+        pixelated = timed(stage_times, "pixelate", pixelate_image, enhanced, size, size)
+        pattern = timed(stage_times, "quantize", quantize_to_pattern, pixelated, num_colors)
+        indexed = timed(stage_times, "index", IndexedPattern.from_image, pattern.to_rgb_image())
+        success = timed(stage_times, "export", export_image_as_excel_pattern, output_directory, "suite", indexed, True, True, backend)
+        # the image starts in column B because of the row numbers column
+        end_cell = get_column(indexed.width + 1) + str(indexed.height)
+        imported = timed(stage_times, "import", import_pattern_from_excel, path.join(output_directory, "suite.xlsx"), "B1", end_cell)
+    round_trip = success and imported != None and np.array_equal(imported.to_rgb_array(), pattern.to_rgb_array())
+    return stage_times, round_trip
+
+def summarize(samples):
+    values = np.array(samples)
+    summary = {"count": len(samples), "median": float(np.median(values)), "min": float(values.min()), "max": float(values.max())}
+    for p in percentiles:
+        summary[f"p{p}"] = float(np.percentile(values, p))
+    return summary
+
+def get_case_key(stage_name, size, num_colors):
+    return f"{stage_name}/{size}/{num_colors}"
+
+# IN: report and baseline dicts, relative threshold, minimum slowdown in seconds
+# OUT: list of (key, baseline median, current median) for every stage that got slower than the threshold allows
+def find_regressions(report, baseline, threshold, min_slowdown=default_min_slowdown):
+    regressions = []
+    for key, summary in report["stages"].items():
+        baseline_summary = baseline.get("stages", {}).get(key)
+        if not baseline_summary:
+            continue
+        slowdown = summary["median"] - baseline_summary["median"]
+        if slowdown > baseline_summary["median"] * threshold and slowdown > min_slowdown:
+            regressions.append((key, baseline_summary["median"], summary["median"]))
+    return regressions
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.suite", description="Benchmark every pipeline stage over test_images.")
+    parser.add_argument("--images", default="*", help="glob of test images to use (default: all)")
+    parser.add_argument("--sizes", type=int, nargs="+", default=default_sizes)
+    parser.add_argument("--colors", type=int, nargs="+", default=default_color_counts)
+    parser.add_argument("--backend", choices=list(export_backends), default="ooxml", help="export backend (default ooxml)")
+    parser.add_argument("--output", help="write the json report to this file (default: print it)")
+    parser.add_argument("--baseline", default=default_baseline_path, help=f"baseline report to compare against (default {default_baseline_path})")
+    parser.add_argument("--threshold", type=float, default=default_threshold, help="allowed slowdown of a stage median, as a fraction (default 0.25)")
+    parser.add_argument("--min-slowdown", type=float, default=default_min_slowdown, help="slowdowns smaller than this many seconds are ignored (default 0.002)")
+    parser.add_argument("--save-baseline", action="store_true", help="store this run as the baseline instead of comparing")
+    return parser
+
+def main(argv):
+    args = build_parser().parse_args(argv[1:])
+    image_paths = get_test_image_paths(args.images)
+
+    samples = {} # case key -> list of seconds, one per image
+    failures = []
+    with TemporaryDirectory() as output_directory:
+        for size in args.sizes:
+            for num_colors in args.colors:
+                for image_path in image_paths:
+                    stage_times, round_trip = run_case(image_path, size, num_colors, args.backend, output_directory)
+                    for stage_name, seconds in stage_times.items():
+                        samples.setdefault(get_case_key(stage_name, size, num_colors), []).append(seconds)
+                    if not round_trip:
+                        failures.append(f"{image_path} {size}x{size} {num_colors} colors")
+                print(f"{size}x{size}, {num_colors} colors: {len(image_paths)} images done", file=sys.stderr)
+
+    report = {
+        "machine": {"python": platform.python_version(), "platform": platform.platform(), "processor": platform.processor()},
+        "settings": {"images": len(image_paths), "sizes": args.sizes, "colors": args.colors, "backend": args.backend},
+        "round_trip_failures": failures,
+        "stages": {key: summarize(values) for key, values in samples.items()},
+    }
+
+    report_json = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as output_file:
+            output_file.write(report_json)
+    else:
+        print(report_json)
+
+    rows = [[key, f"{s['median'] * 1000:.2f}", f"{s['p90'] * 1000:.2f}", f"{s['p99'] * 1000:.2f}"] for key, s in report["stages"].items()]
+    with contextlib.redirect_stdout(sys.stderr):
+        print_table(["stage/size/colors", "median ms", "p90 ms", "p99 ms"], rows)
+
+    exit_code = 0
+    if failures:
+        print(f"{len(failures)} round trips failed: " + ", ".join(failures), file=sys.stderr)
+        exit_code = 1
+
+    if args.save_baseline:
+        with open(args.baseline, "w") as baseline_file:
+            baseline_file.write(report_json)
+        print(f"Baseline saved to '{args.baseline}'", file=sys.stderr)
+    elif path.isfile(args.baseline):
+        with open(args.baseline) as baseline_file:
+            baseline = json.load(baseline_file)
+        regressions = find_regressions(report, baseline, args.threshold, args.min_slowdown)
+        for key, baseline_median, median in regressions:
+            print(f"REGRESSION {key}: {baseline_median * 1000:.2f} ms -> {median * 1000:.2f} ms", file=sys.stderr)
+        if regressions:
+            exit_code = 1
+        else:
+            print(f"No stage regressed more than {args.threshold:.0%} against '{args.baseline}'", file=sys.stderr)
+    else:
+        print(f"No baseline at '{args.baseline}', run with --save-baseline to store one", file=sys.stderr)
+
+    return exit_code
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
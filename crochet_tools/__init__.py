@@ -0,0 +1,22 @@
+"""
+Copyright (c) 2025 Nicholas Tallarico
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+
+"""
+
+#################################
+#       Crochet Tools            
+#            v1.0                
+#################################
+
+# crochet_tools.core is the headless engine (no Tk). it is safe to import from batch workers, scripts and tests.
+# crochet_tools.gui is the customtkinter app. importing it builds the window, so only the launcher should import it.
+
+__version__ = "1.0"
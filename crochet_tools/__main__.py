@@ -0,0 +1,14 @@
+import sys
+
+# ---------- Launch ----------
+
+# run with: python -m crochet_tools              (GUI)
+#           python -m crochet_tools batch ...    (command line batch conversion, see cli.py)
+# the guard keeps worker processes of a batch from launching anything when they import this module
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "batch":
+        from crochet_tools import cli
+        sys.exit(cli.main(sys.argv[2:]))
+    else:
+        from crochet_tools import gui
+        gui.main()
@@ -0,0 +1,101 @@
+# ---------- Command Line ----------
+
+# batch conversion of images to excel patterns without the GUI
+# run with: python -m crochet_tools batch "test_images/*.jpg" --width 75 --height 75 --colors 5
+
+import argparse
+import os
+import sys
+from glob import glob
+from time import perf_counter
+from crochet_tools.core import (
+    csv_output_directory,
+    get_dimensions_error,
+    get_num_colors_error,
+    get_gauge_error,
+    default_gauge_stitches,
+    default_gauge_rows,
+    Gauge,
+    get_quantizer_error,
+    quantizers,
+    get_pixelation_method_error,
+    pixelation_methods,
+    export_backends,
+    BatchOptions,
+    run_batch,
+)
+
+def positive_int(value):
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, got {number}")
+    return number
+
+def build_batch_parser():
+    parser = argparse.ArgumentParser(prog="python -m crochet_tools batch", description="Convert images to excel crochet patterns.")
+    parser.add_argument("patterns", nargs="+", help="image files or glob patterns, e.g. 'test_images/*.jpg'")
+    parser.add_argument("--width", type=int, default=75, help="width in stitches (default 75)")
+    parser.add_argument("--height", type=int, default=None, help="height in rows (default: from the width, the image proportions and the gauge)")
+    parser.add_argument("--gauge-stitches", type=float, default=default_gauge_stitches, help=f"stitches per 10 cm (default {default_gauge_stitches})")
+    parser.add_argument("--gauge-rows", type=float, default=default_gauge_rows, help=f"rows per 10 cm (default {default_gauge_rows})")
+    parser.add_argument("--colors", type=int, default=3, help="number of colors (default 3)")
+    parser.add_argument("--brightness", type=float, default=1.0)
+    parser.add_argument("--contrast", type=float, default=1.0)
+    parser.add_argument("--saturation", type=float, default=1.0)
+    parser.add_argument("--pixelation", choices=list(pixelation_methods), default=None, help="how stitches are sampled from the image (default: the GUI default)")
+    parser.add_argument("--quantizer", choices=list(quantizers), default=None, help="color quantizer (default: the GUI default)")
+    parser.add_argument("--yarn-colors", action="store_true", help="use the closest DMC chart colors")
+    parser.add_argument("--include-pixel-numbers", action="store_true", help="write the color number in every cell")
+    parser.add_argument("--no-row-numbers", action="store_true", help="leave out the row number columns")
+    parser.add_argument("--backend", choices=list(export_backends), default="ooxml", help="excel writer (default ooxml, the fastest)")
+    parser.add_argument("--output-directory", default=csv_output_directory, help=f"where the .xlsx files go (default '{csv_output_directory}')")
+    parser.add_argument("--workers", type=positive_int, default=os.cpu_count() or 1, help="worker processes (default: one per core)")
+    return parser
+
+# expand the glob patterns, keeping the order given and dropping duplicates. plain file names are kept even without a match
+def get_image_paths(patterns):
+    image_paths = []
+    for pattern in patterns:
+        for image_path in sorted(glob(pattern)) or [pattern]:
+            if image_path not in image_paths:
+                image_paths.append(image_path)
+    return image_paths
+
+def print_batch_result(result):
+    status = "ok" if result.success else f"FAILED: {result.error}"
+    print(f"{result.seconds:8.2f}s  {result.image_path} -> {result.output_file_path}  {status}", flush=True)
+
+# IN: command line arguments after "batch"
+# OUT: exit code, 0 if every image converted
+def main(argv):
+    parser = build_batch_parser()
+    args = parser.parse_args(argv)
+
+    # a derived height is checked per image, once the image proportions are known
+    for error_message in (get_dimensions_error(args.width, args.width if args.height == None else args.height), get_num_colors_error(args.colors),
+                          get_gauge_error(args.gauge_stitches, args.gauge_rows),
+                          args.pixelation and get_pixelation_method_error(args.pixelation), args.quantizer and get_quantizer_error(args.quantizer)):
+        if error_message:
+            parser.error(error_message)
+
+    image_paths = get_image_paths(args.patterns)
+    options = BatchOptions(width=args.width, height=args.height, gauge=Gauge(args.gauge_stitches, args.gauge_rows), num_colors=args.colors, brightness=args.brightness,
+                           contrast=args.contrast, saturation=args.saturation, pixelation=args.pixelation, quantizer=args.quantizer,
+                           use_yarn_colors=args.yarn_colors, include_pixel_numbers=args.include_pixel_numbers,
+                           include_row_numbers=not args.no_row_numbers, backend=args.backend,
+                           output_directory=args.output_directory)
+
+    print(f"Converting {len(image_paths)} images with {min(args.workers, len(image_paths))} workers", flush=True)
+    start = perf_counter()
+    results = run_batch(image_paths, options, args.workers, on_result=print_batch_result)
+    elapsed = perf_counter() - start
+
+    failures = [result for result in results if not result.success]
+    total_seconds = sum(result.seconds for result in results)
+    print(f"Done: {len(results) - len(failures)} converted, {len(failures)} failed in {elapsed:.2f}s ({total_seconds:.2f}s of work)")
+    for result in failures:
+        print(f"  {result.image_path}: {result.error}")
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
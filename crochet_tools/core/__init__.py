@@ -0,0 +1,24 @@
+# headless crochet pattern engine. nothing in this package may import tkinter / customtkinter or touch global UI state,
+# so it can be used from batch workers, scripts and tests as well as from the GUI.
+
+from crochet_tools.core.config import csv_output_directory, max_color_input, min_color_input, max_dimension_input, min_dimension_input, default_gauge_stitches, default_gauge_rows, preview_size, proxy_oversample, export_rows_per_check, export_progress_interval, color_chart_path, color_chart_cache_path
+from crochet_tools.core.validation import get_dimensions_error, get_gauge_error, get_num_colors_error
+from crochet_tools.core.progress import ProgressThrottle, OperationCancelled, check_cancelled
+from crochet_tools.core.instrumentation import instrumented, enable_instrumentation, disable_instrumentation, reset_stage_stats, get_stage_stats, dump_stage_stats
+from crochet_tools.core.cache import ResultCache, result_cache, get_image_digest
+from crochet_tools.core.indexed_pattern import IndexedPattern
+from crochet_tools.core.palette_tree import PaletteTree
+from crochet_tools.core.color_science import rgb_to_lab, delta_e76, delta_e2000, get_delta_e_matrix, get_nearest_colors, get_mean_delta_e
+from crochet_tools.core.quantizers import quantizers, default_quantizer, get_quantizer_error, compare_quantizers
+from crochet_tools.core.gauge import Gauge, get_grid_size
+from crochet_tools.core.pixelate import pixelation_methods, default_pixelation_method, get_pixelation_method_error, pixelate
+from crochet_tools.core.loader import SourceImage, source_min_short_side, get_reduce_factor, load_source_image
+from crochet_tools.core.image_ops import get_proxy_long_side, make_proxy, apply_color_sliders, pixelate_image, quantize_to_pattern, cached_pixelate_image, cached_quantize_to_pattern, cached_palette_tree, get_tree_pattern, get_quantized_pattern, quantize_image, pixel_shift
+from crochet_tools.core.yarn_chart import YarnChart, get_yarn_chart, get_nearest_chart_indices, get_yarn_pattern
+from crochet_tools.core.pipeline import Pipeline, build_pattern_pipeline
+from crochet_tools.core.worker import LatestWinsWorker
+from crochet_tools.core.pattern import get_color_arrays, get_colors, color_arrays_to_columns, pack_rgb, unpack_rgb, get_font_color, rgb_to_hex
+from crochet_tools.core.cells import get_column
+from crochet_tools.core.ooxml import write_pattern_ooxml
+from crochet_tools.core.excel import export_backends, write_pattern_openpyxl, check_output_directory, cleanup_workbook, get_sheet_name, export_image_as_excel_pattern, import_pattern_from_excel
+from crochet_tools.core.batch import BatchOptions, BatchResult, get_batch_output_name, get_batch_output_names, convert_image_to_pattern_file, run_batch
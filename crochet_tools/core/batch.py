@@ -0,0 +1,123 @@
+import io
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from contextlib import redirect_stdout
+from os import path
+from time import perf_counter
+from crochet_tools.core.config import csv_output_directory
+from crochet_tools.core.validation import get_dimensions_error
+from crochet_tools.core.gauge import get_grid_size
+from crochet_tools.core.loader import load_source_image
+from crochet_tools.core.pipeline import build_pattern_pipeline
+from crochet_tools.core.excel import export_image_as_excel_pattern, default_export_backend, check_output_directory
+
+# ---------- Batch Conversion ----------
+
+# settings shared by every image of a batch. the defaults match the GUI defaults.
+# height None means the number of rows is derived from the width, the image proportions and the gauge (Gauge, None for the default)
+class BatchOptions:
+    def __init__(self, width=75, height=None, gauge=None, num_colors=3, brightness=1.0, contrast=1.0, saturation=1.0, pixelation=None, quantizer=None,
+                 use_yarn_colors=False, include_pixel_numbers=False, include_row_numbers=True,
+                 backend=default_export_backend, output_directory=csv_output_directory):
+        self.width = width
+        self.height = height
+        self.gauge = gauge
+        self.num_colors = num_colors
+        self.brightness = brightness
+        self.contrast = contrast
+        self.saturation = saturation
+        self.pixelation = pixelation
+        self.quantizer = quantizer
+        self.use_yarn_colors = use_yarn_colors
+        self.include_pixel_numbers = include_pixel_numbers
+        self.include_row_numbers = include_row_numbers
+        self.backend = backend
+        self.output_directory = output_directory
+
+# outcome of converting one image
+class BatchResult:
+    def __init__(self, image_path, output_file_path, seconds, success, error=None, log=""):
+        self.image_path = image_path
+        self.output_file_path = output_file_path
+        self.seconds = seconds
+        self.success = success
+        self.error = error
+        self.log = log # everything the conversion printed
+
+# IN: image path
+# OUT: output file name (no extension): the image file name without its extension
+def get_batch_output_name(image_path):
+    return path.splitext(path.basename(image_path))[0]
+
+# IN: image paths
+# OUT: dict of image path -> output file name. images with the same name (e.g. a/x.png and b/x.jpg) would write the
+# same file, so later ones get a number: x, x_2, x_3. names are compared without case, like on Windows and macOS
+def get_batch_output_names(image_paths):
+    output_names = {}
+    used_names = set()
+    for image_path in image_paths:
+        base_name = get_batch_output_name(image_path)
+        output_name = base_name
+        number = 1
+        while output_name.lower() in used_names:
+            number += 1
+            output_name = f"{base_name}_{number}"
+        used_names.add(output_name.lower())
+        output_names[image_path] = output_name
+    return output_names
+
+# DESC: convert one image to an excel pattern with the same pipeline as the GUI. runs in a worker process
+# IN: image path, BatchOptions, output file name (no extension, default: from the image name)
+# OUT: BatchResult. errors are caught and reported in the result instead of raised
+def convert_image_to_pattern_file(image_path, options, output_name=None):
+    start = perf_counter()
+    output_name = output_name or get_batch_output_name(image_path)
+    output_file_path = path.join(options.output_directory, output_name + ".xlsx")
+    log = io.StringIO()
+    export_errors = []
+    try:
+        # the export prints progress, which would interleave between workers. keep it with the result instead
+        with redirect_stdout(log):
+            source_image = load_source_image(image_path)
+            width, height = get_grid_size(source_image.full_size, options.width, options.height, options.gauge)
+            error = get_dimensions_error(width, height)
+            if error:
+                return BatchResult(image_path, output_file_path, perf_counter() - start, False, error, log.getvalue())
+            pipeline = build_pattern_pipeline()
+            pipeline.set_params(source=source_image.image, brightness=options.brightness, contrast=options.contrast,
+                                saturation=options.saturation, width=width, height=height,
+                                pixelation=options.pixelation, num_colors=options.num_colors, quantizer=options.quantizer,
+                                use_yarn_colors=options.use_yarn_colors)
+            pattern = pipeline.get("lvl3")
+            success = export_image_as_excel_pattern(options.output_directory, output_name, pattern,
+                                                    options.include_pixel_numbers, options.include_row_numbers,
+                                                    options.backend, on_error=export_errors.append)
+        error = None if success else (export_errors[-1] if export_errors else "export failed")
+        return BatchResult(image_path, output_file_path, perf_counter() - start, success, error, log.getvalue())
+    except Exception as e:
+        return BatchResult(image_path, output_file_path, perf_counter() - start, False, str(e), log.getvalue())
+
+# DESC: convert many images in parallel, one worker process per core by default
+# IN: image paths, BatchOptions, number of worker processes, optional callback(BatchResult) called as each image finishes
+# OUT: list of BatchResult in the order of image_paths
+# every image is independent (own pipeline, own caches), so throughput scales with the number of cores.
+# a worker process that dies (e.g. out of memory) fails the images it had, not the whole batch
+def run_batch(image_paths, options, workers=None, on_result=None):
+    workers = workers or os.cpu_count() or 1
+    results = {}
+    output_names = get_batch_output_names(image_paths)
+    # created once up front, so the workers never race to create it
+    check_output_directory(options.output_directory)
+    with ProcessPoolExecutor(max_workers=min(workers, max(len(image_paths), 1))) as executor:
+        futures = {executor.submit(convert_image_to_pattern_file, image_path, options, output_names[image_path]): image_path for image_path in image_paths}
+        for future in as_completed(futures):
+            image_path = futures[future]
+            try:
+                result = future.result()
+            except Exception as e:
+                output_file_path = path.join(options.output_directory, output_names[image_path] + ".xlsx")
+                result = BatchResult(image_path, output_file_path, 0.0, False, f"worker failed: {str(e) or type(e).__name__}")
+            results[image_path] = result
+            if on_result:
+                on_result(result)
+    return [results[image_path] for image_path in image_paths]
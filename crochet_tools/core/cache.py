@@ -0,0 +1,81 @@
+import threading
+from collections import OrderedDict
+from hashlib import blake2b
+
+# ---------- Result Cache ----------
+
+# least recently used cache of processing results, bounded by the total size of the cached results in bytes.
+# keys are tuples that include a content digest of the input, so an equal image gives a hit even if it is a new object.
+# hits and misses are counted for metrics. safe to use from several threads
+class ResultCache:
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict() # key -> (value, size in bytes)
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    # return the cached value for key, or compute it, cache it and return it
+    def get_or_compute(self, key, compute):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+
+        value = compute()
+        self.put(key, value)
+        return value
+
+    def put(self, key, value):
+        size = get_result_size(value)
+        with self.lock:
+            if key in self.entries:
+                self.total_bytes -= self.entries.pop(key)[1]
+            # results bigger than the whole cache are not kept
+            if size > self.max_bytes:
+                return
+            self.entries[key] = (value, size)
+            self.total_bytes += size
+            # evict least recently used results until back under the size limit
+            while self.total_bytes > self.max_bytes:
+                evicted_key, (evicted_value, evicted_size) = self.entries.popitem(last=False)
+                self.total_bytes -= evicted_size
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.total_bytes = 0
+
+    def get_stats(self):
+        with self.lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "entries": len(self.entries),
+                "bytes": self.total_bytes,
+                "max_bytes": self.max_bytes,
+            }
+
+# approximate memory used by a cached result (PIL image, IndexedPattern or anything with nbytes)
+def get_result_size(value):
+    if value is None:
+        return 0
+    if hasattr(value, "indices") and hasattr(value, "palette"):
+        return value.indices.nbytes + value.palette.nbytes
+    if hasattr(value, "getbands"):
+        return value.width * value.height * len(value.getbands())
+    return getattr(value, "nbytes", 0)
+
+# content digest of a PIL image, for use in cache keys
+def get_image_digest(image):
+    digest = blake2b(digest_size=16)
+    digest.update(f"{image.mode} {image.width}x{image.height}".encode("utf-8"))
+    digest.update(image.tobytes())
+    return digest.hexdigest()
+
+# shared cache for pixelate / quantize results. 64 MB holds hundreds of max size patterns
+result_cache = ResultCache(max_bytes=64 * 1024 * 1024)
@@ -0,0 +1,16 @@
+from string import ascii_uppercase
+
+# ---------- Cell Addressing ----------
+
+def get_column(num):
+    def divmod_excel(n):
+        a, b = divmod(n, 26)
+        if b == 0:
+            return a - 1, b + 26
+        return a, b
+
+    chars = []
+    while num > 0:
+        num, d = divmod_excel(num)
+        chars.append(ascii_uppercase[d - 1])
+    return ''.join(reversed(chars)).upper()
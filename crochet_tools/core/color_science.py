@@ -0,0 +1,180 @@
+import numpy as np
+
+# ---------- Color Science ----------
+
+# batched color conversion and color difference. everything works on numpy arrays whose last axis is the 3 channels,
+# and the difference functions broadcast, so a palette against a chart is one call with no python loops per color.
+
+# sRGB (D65) -> XYZ
+srgb_to_xyz_matrix = np.array([
+    [0.4124564, 0.3575761, 0.1804375],
+    [0.2126729, 0.7151522, 0.0721750],
+    [0.0193339, 0.1191920, 0.9503041],
+])
+d65_white = np.array([0.95047, 1.0, 1.08883])
+lab_epsilon = (6 / 29) ** 3
+
+distance_chunk_size = 16384 # colors compared against the targets at a time by the matrix product, bounds its memory
+difference_matrix_max_pairs = 1 << 20 # color pairs in each block of the difference matrix get_nearest_colors computes
+delta_e2000_candidates = 4 # closest targets in the embedding that the approximate CIEDE2000 search rechecks exactly
+
+# IN: array of rgb values 0-255, shape (..., 3)
+# OUT: float array of Lab values, same shape
+def rgb_to_lab(rgb):
+    rgb = np.asarray(rgb, dtype=np.float64) / 255.0
+    linear = np.where(rgb <= 0.04045, rgb / 12.92, ((rgb + 0.055) / 1.055) ** 2.4)
+    xyz = linear @ srgb_to_xyz_matrix.T / d65_white
+    f = np.where(xyz > lab_epsilon, np.cbrt(xyz), xyz / (3 * (6 / 29) ** 2) + 4 / 29)
+    lab = np.empty_like(f)
+    lab[..., 0] = 116 * f[..., 1] - 16
+    lab[..., 1] = 500 * (f[..., 0] - f[..., 1])
+    lab[..., 2] = 200 * (f[..., 1] - f[..., 2])
+    return lab
+
+# CIE76 color difference: euclidean distance in Lab
+def delta_e76(lab1, lab2):
+    return np.sqrt(((np.asarray(lab1) - np.asarray(lab2)) ** 2).sum(axis=-1))
+
+# CIEDE2000 color difference (Sharma, Wu and Dalal 2005), with kL = kC = kH = 1
+def delta_e2000(lab1, lab2):
+    lab1 = np.asarray(lab1, dtype=np.float64)
+    lab2 = np.asarray(lab2, dtype=np.float64)
+    l1, a1, b1 = lab1[..., 0], lab1[..., 1], lab1[..., 2]
+    l2, a2, b2 = lab2[..., 0], lab2[..., 1], lab2[..., 2]
+
+    c_mean = (np.hypot(a1, b1) + np.hypot(a2, b2)) / 2
+    g = 0.5 * (1 - np.sqrt(c_mean ** 7 / (c_mean ** 7 + 25.0 ** 7)))
+    a1p = (1 + g) * a1
+    a2p = (1 + g) * a2
+    c1p = np.hypot(a1p, b1)
+    c2p = np.hypot(a2p, b2)
+    h1p = np.degrees(np.arctan2(b1, a1p)) % 360
+    h2p = np.degrees(np.arctan2(b2, a2p)) % 360
+
+    delta_l = l2 - l1
+    delta_c = c2p - c1p
+    chroma_product = c1p * c2p
+    delta_h_angle = h2p - h1p
+    delta_h_angle = np.where(delta_h_angle > 180, delta_h_angle - 360, delta_h_angle)
+    delta_h_angle = np.where(delta_h_angle < -180, delta_h_angle + 360, delta_h_angle)
+    delta_h_angle = np.where(chroma_product == 0, 0, delta_h_angle)
+    delta_h = 2 * np.sqrt(chroma_product) * np.sin(np.radians(delta_h_angle) / 2)
+
+    l_mean = (l1 + l2) / 2
+    c_mean_p = (c1p + c2p) / 2
+    h_sum = h1p + h2p
+    h_mean = np.where(np.abs(h1p - h2p) > 180, np.where(h_sum < 360, h_sum + 360, h_sum - 360), h_sum) / 2
+    h_mean = np.where(chroma_product == 0, h_sum, h_mean)
+
+    t = (1 - 0.17 * np.cos(np.radians(h_mean - 30)) + 0.24 * np.cos(np.radians(2 * h_mean))
+         + 0.32 * np.cos(np.radians(3 * h_mean + 6)) - 0.20 * np.cos(np.radians(4 * h_mean - 63)))
+    delta_theta = 30 * np.exp(-(((h_mean - 275) / 25) ** 2))
+    r_c = 2 * np.sqrt(c_mean_p ** 7 / (c_mean_p ** 7 + 25.0 ** 7))
+    s_l = 1 + 0.015 * (l_mean - 50) ** 2 / np.sqrt(20 + (l_mean - 50) ** 2)
+    s_c = 1 + 0.045 * c_mean_p
+    s_h = 1 + 0.015 * c_mean_p * t
+    r_t = -np.sin(np.radians(2 * delta_theta)) * r_c
+
+    return np.sqrt((delta_l / s_l) ** 2 + (delta_c / s_c) ** 2 + (delta_h / s_h) ** 2 + r_t * (delta_c / s_c) * (delta_h / s_h))
+
+delta_e_functions = {
+    "cie76": delta_e76,
+    "ciede2000": delta_e2000,
+}
+
+# IN: (N, 3) and (M, 3) Lab arrays, metric name
+# OUT: (N, M) matrix of color differences
+def get_delta_e_matrix(lab1, lab2, metric="cie76"):
+    return delta_e_functions[metric](np.asarray(lab1)[:, None, :], np.asarray(lab2)[None, :, :])
+
+# lightness scale of CIEDE2000 (S_L) integrated over L, so distances along L in the embedding below follow it
+embedding_lightness_levels = np.linspace(0, 100, 1001)
+embedding_lightness_scale = 1 + 0.015 * (embedding_lightness_levels - 50) ** 2 / np.sqrt(20 + (embedding_lightness_levels - 50) ** 2)
+embedding_lightness = np.concatenate([[0], np.cumsum((1 / embedding_lightness_scale[1:] + 1 / embedding_lightness_scale[:-1]) / 2 * 0.1)])
+
+# IN: array of Lab values, shape (..., 3)
+# OUT: float32 array of the same colors in a space where euclidean distance roughly follows CIEDE2000: the a axis is
+# stretched by the CIEDE2000 G factor, chroma is compressed like the S_H term and lightness like the S_L term.
+# used to pick a few candidates cheaply before computing the exact CIEDE2000 differences
+def lab_to_delta_e2000_embedding(lab):
+    lab = np.asarray(lab, dtype=np.float64)
+    chroma = np.hypot(lab[..., 1], lab[..., 2])
+    g = 0.5 * (1 - np.sqrt(chroma ** 7 / (chroma ** 7 + 25.0 ** 7)))
+    a = (1 + g) * lab[..., 1]
+    chroma = np.hypot(a, lab[..., 2])
+    chroma_scale = 1 / (1 + 0.015 * chroma)
+    lightness = np.interp(lab[..., 0], embedding_lightness_levels, embedding_lightness)
+    return np.stack([lightness, a * chroma_scale, lab[..., 2] * chroma_scale], axis=-1).astype(np.float32)
+
+# IN: (N, 3) query points, (M, 3) target points
+# OUT: (N, num_nearest) indices of the closest targets of each query by euclidean distance, closest first
+# float64 points are compared in float64, anything else in float32. the squared distances come from one matrix product
+# with the |q|^2 term dropped, since it is the same for every target
+def get_closest_points(points, target_points, num_nearest=1):
+    dtype = np.result_type(np.asarray(points).dtype, np.asarray(target_points).dtype, np.float32)
+    points = np.asarray(points, dtype=dtype)
+    target_points = np.asarray(target_points, dtype=dtype)
+    augmented_points = np.concatenate([points, np.ones((len(points), 1), dtype=dtype)], axis=1)
+    augmented_targets = np.concatenate([-2 * target_points, (target_points ** 2).sum(axis=1, keepdims=True)], axis=1)
+    distances = augmented_points @ augmented_targets.T
+    nearest = np.empty((len(points), num_nearest), dtype=np.int64)
+    rows = np.arange(len(points))
+    # a few argmin passes are faster than argpartition for a handful of neighbours
+    for i in range(num_nearest):
+        nearest[:, i] = np.argmin(distances, axis=1)
+        distances[rows, nearest[:, i]] = np.inf
+    return nearest
+
+# DESC: find the closest target color of every color
+# IN: (..., 3) rgb colors, (M, 3) rgb target colors (a palette or a yarn chart), metric name, whether a large CIEDE2000
+# search may be approximate
+# OUT: (...) index of the closest target of each color
+# each distinct color is matched once, and the result is exact by default. CIEDE2000 computes the difference matrix in
+# blocks of difference_matrix_max_pairs, so its cost is distinct colors x targets: a few ms for a palette against the
+# chart, about 0.4 s for 32k colors against a 32 color palette. CIE76 uses a matrix product in Lab for large problems.
+# approximate=True makes large CIEDE2000 searches recheck only the delta_e2000_candidates closest targets in
+# lab_to_delta_e2000_embedding with the exact formula. against a 500 color chart that finds the exact match for 96-100%
+# of the colors of the test images (a close but not closest one for the rest), in up to about 0.8 s for a 500x500 photo
+# with many distinct colors such as baboon, instead of tens of seconds (see benchmarks/bench_color_science.py)
+def get_nearest_colors(rgb, target_rgb, metric="ciede2000", approximate=False):
+    rgb = np.asarray(rgb, dtype=np.uint8)
+    flat = rgb.reshape(-1, 3).astype(np.uint32)
+    packed = (flat[:, 0] << 16) | (flat[:, 1] << 8) | flat[:, 2]
+    unique_packed, inverse = np.unique(packed, return_inverse=True)
+    unique_rgb = np.stack([(unique_packed >> 16) & 0xFF, (unique_packed >> 8) & 0xFF, unique_packed & 0xFF], axis=-1)
+
+    lab = rgb_to_lab(unique_rgb)
+    target_lab = rgb_to_lab(np.asarray(target_rgb).reshape(-1, 3))
+    nearest = np.empty(len(lab), dtype=np.int64)
+    small = len(lab) * len(target_lab) <= difference_matrix_max_pairs
+
+    if metric == "cie76" and not small:
+        for start in range(0, len(lab), distance_chunk_size):
+            nearest[start:start + distance_chunk_size] = get_closest_points(lab[start:start + distance_chunk_size], target_lab)[:, 0]
+    elif approximate and not small:
+        embedded = lab_to_delta_e2000_embedding(lab)
+        target_embedded = lab_to_delta_e2000_embedding(target_lab)
+        num_candidates = min(delta_e2000_candidates, len(target_lab))
+        for start in range(0, len(lab), distance_chunk_size):
+            chunk = lab[start:start + distance_chunk_size]
+            candidates = get_closest_points(embedded[start:start + distance_chunk_size], target_embedded, num_candidates)
+            candidate_differences = delta_e_functions[metric](chunk[:, None, :], target_lab[candidates])
+            nearest[start:start + distance_chunk_size] = candidates[np.arange(len(chunk)), np.argmin(candidate_differences, axis=1)]
+    else:
+        block_size = max(1, difference_matrix_max_pairs // len(target_lab))
+        for start in range(0, len(lab), block_size):
+            nearest[start:start + block_size] = np.argmin(get_delta_e_matrix(lab[start:start + block_size], target_lab, metric), axis=1)
+
+    return nearest[inverse].reshape(rgb.shape[:-1])
+
+# IN: two rgb images (PIL or arrays) of the same size
+# OUT: mean CIE76 difference over all pixels. each distinct pair of colors is converted once
+def get_mean_delta_e(image1, image2):
+    rgb1 = np.asarray(image1, dtype=np.uint8).reshape(-1, 3)
+    rgb2 = np.asarray(image2, dtype=np.uint8).reshape(-1, 3)
+    # both colors of a pixel packed into one 48 bit key
+    keys = np.concatenate([rgb1, rgb2], axis=1).astype(np.uint64) @ (np.uint64(1) << np.arange(40, -1, -8, dtype=np.uint64))
+    keys, counts = np.unique(keys, return_counts=True)
+    pairs = ((keys[:, None] >> np.arange(40, -1, -8, dtype=np.uint64)) & np.uint64(0xFF)).astype(np.uint8)
+    distances = delta_e76(rgb_to_lab(pairs[:, :3]), rgb_to_lab(pairs[:, 3:]))
+    return float(distances @ counts / counts.sum())
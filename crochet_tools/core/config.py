@@ -0,0 +1,30 @@
+# ---------- Global Variables ----------
+
+# Functionality
+csv_output_directory = "input_output"
+max_color_input = 32
+min_color_input = 1
+max_dimension_input = 500
+min_dimension_input = 1
+
+# Yarn colors
+color_chart_path = "color_chart.xlsx" # DMC chart: code, name, red, green, blue, hex
+color_chart_cache_path = "color_chart.npz" # compiled chart, rebuilt when color_chart.xlsx changes
+
+# Gauge
+default_gauge_stitches = 16 # stitches per 10 cm. single crochet in worsted weight yarn
+default_gauge_rows = 18 # rows per 10 cm. single crochet stitches are wider than they are tall, so more rows than stitches
+
+# Preview
+preview_size = 500 # size of the image display boxes in the GUI. the preview proxy is never smaller than this
+proxy_oversample = 2 # the preview proxy has at least this many source pixels per stitch in each direction
+
+# Excel pattern layout (shared by every export backend)
+column_size = 2.8 # this number is about 20 pixels, same as the default height
+cell_fill_type = 'solid'
+legend_buffer = 2
+legend_headers = ["Color", "HEX", "Red Value", "Green Value", "Blue Value"]
+
+# Export
+export_rows_per_check = 16 # rows written between checks for cancel and progress updates
+export_progress_interval = 0.1 # seconds between export progress updates, so at most 10 per second
@@ -0,0 +1,313 @@
+import os
+import stat
+from os import path, makedirs, close, remove, replace
+from tempfile import mkstemp
+import numpy as np
+from openpyxl import styles, Workbook, load_workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.utils.cell import coordinate_from_string, column_index_from_string
+from crochet_tools.core.config import column_size, cell_fill_type, legend_buffer, legend_headers, export_rows_per_check, export_progress_interval
+from crochet_tools.core.cells import get_column
+from crochet_tools.core.pattern import get_font_color, rgb_to_hex
+from crochet_tools.core.ooxml import write_pattern_ooxml
+from crochet_tools.core.indexed_pattern import IndexedPattern
+from crochet_tools.core.progress import ProgressThrottle, OperationCancelled, check_cancelled
+from crochet_tools.core.instrumentation import instrumented
+
+# ---------- Workbook Helpers ----------
+
+# create the output directory if it is missing. safe when several batch workers do it at the same time
+def check_output_directory(output_directory):
+    makedirs(output_directory, exist_ok=True)
+
+def cleanup_workbook(wb):
+    """Clean up workbook resources"""
+    try:
+        if wb:
+            wb.close()
+    except Exception as e:
+        print(f"Warning: Error during workbook cleanup: {str(e)}")
+
+sheet_name_invalid_characters = str.maketrans("", "", "[]:*?/\\")
+max_sheet_name_length = 31 # longest sheet name excel accepts
+default_sheet_name = "Pattern"
+
+# IN: output file name
+# OUT: the name as an excel sheet name: without the characters excel rejects in sheet names ([]:*?/\) or a leading or
+# trailing apostrophe, cut to max_sheet_name_length. both export backends get this name, so they write the same sheet
+def get_sheet_name(output_file_name):
+    sheet_name = output_file_name.translate(sheet_name_invalid_characters)[:max_sheet_name_length].strip("'")
+    return sheet_name or default_sheet_name
+
+# ---------- Export ----------
+
+# build one styled write-only cell per palette color. every stitch of that color in the pattern is the same cell,
+# so the styles are created once per color instead of once per stitch, and the same cell object is appended for each stitch
+def build_pattern_cells(ws, pattern, include_pixel_numbers):
+    cell_alignment = styles.Alignment(horizontal='center')
+    cell_border = styles.Border(left=styles.Side(style='thin'), right=styles.Side(style='thin'), top=styles.Side(style='thin'), bottom=styles.Side(style='thin'))
+    pattern_cells = []
+    for color_symbol, color_rgb in enumerate(pattern.palette.tolist()):
+        cell_color = rgb_to_hex(color_rgb)
+        cell = WriteOnlyCell(ws, value=color_symbol if include_pixel_numbers else None)
+        cell.alignment = cell_alignment
+        cell.fill = styles.PatternFill(fill_type=cell_fill_type, start_color=cell_color, end_color=cell_color)
+        cell.border = cell_border
+        cell.font = styles.Font(name='Calibri', bold=False, italic=False, color=get_font_color(color_rgb))
+        pattern_cells.append(cell)
+    return pattern_cells
+
+# legend cells for one row of the sheet: the header on row 0, then one row per palette color
+def build_legend_row(ws, pattern, row, include_pixel_numbers):
+    if row == 0:
+        return list(legend_headers)
+    color_symbol = row - 1
+    color_rgb = pattern.palette[color_symbol].tolist()
+    color_hex = rgb_to_hex(color_rgb)
+    color_cell = WriteOnlyCell(ws, value=str(color_symbol) if include_pixel_numbers else None)
+    color_cell.fill = styles.PatternFill(fill_type=cell_fill_type, start_color=color_hex, end_color=color_hex)
+    color_cell.font = styles.Font(color=get_font_color(color_rgb))
+    return [color_cell, str(color_hex), str(color_rgb[0]), str(color_rgb[1]), str(color_rgb[2])]
+
+def build_row_number_cell(ws, row_number, alignment):
+    cell = WriteOnlyCell(ws, value=str(row_number))
+    cell.alignment = alignment
+    return cell
+
+# DESC: write an IndexedPattern as an excel pattern file with openpyxl
+# IN: output file path, sheet name, IndexedPattern, export flags, optional progress callback(rows done, total rows)
+#     and cancel event
+# OUT: True once written. raises OperationCancelled if the cancel event is set while writing, and any error writing the
+# file as is, so export_image_as_excel_pattern can report it
+# the sheet is written with a write-only workbook one row at a time, so memory stays bounded by a single row
+def write_pattern_openpyxl(output_file_path, sheet_name, pattern, include_pixel_numbers = False, include_row_numbers = True, progress = None, cancel_event = None):
+    wb = None
+
+    try:
+        width, height = pattern.size
+
+        # create worksheet
+        wb = Workbook(write_only=True)
+        ws = wb.create_sheet(sheet_name)
+
+        # column widths have to be set before any rows are written
+        image_first_column = 2 if include_row_numbers else 1
+        for x in range(0, width):
+            ws.column_dimensions[get_column(x + image_first_column)].width = column_size
+
+        pattern_cells = build_pattern_cells(ws, pattern, include_pixel_numbers)
+        left_alignment = styles.Alignment(horizontal='left')
+        right_alignment = styles.Alignment(horizontal='right')
+
+        # legend goes to the right of the image (and the right row numbers column), after legend_buffer empty columns
+        legend_start = width + (2 if include_row_numbers else 1)
+        legend_column = legend_start + legend_buffer + 1
+        legend_rows = pattern.num_colors + 1
+
+        total_rows = max(height, legend_rows)
+        for y in range(0, total_rows):
+            if y % export_rows_per_check == 0:
+                check_cancelled(cancel_event)
+                if progress: progress(y, total_rows)
+            if y < height and y % 50 == 0:
+                print("Processing row: " + str(y+1) + "/" + str(height))
+            row = []
+            if y < height:
+                # if including row numbers, row numbers go in the columns to the left and right of the image, counting down
+                if include_row_numbers: row.append(build_row_number_cell(ws, height - y, right_alignment))
+                row.extend([pattern_cells[i] for i in pattern.indices[y].tolist()])
+                if include_row_numbers: row.append(build_row_number_cell(ws, height - y, left_alignment))
+            if y < legend_rows:
+                row.extend([None] * (legend_column - 1 - len(row)))
+                row.extend(build_legend_row(ws, pattern, y, include_pixel_numbers))
+            ws.append(row)
+
+        check_cancelled(cancel_event)
+        wb.save(output_file_path)
+        if progress: progress(total_rows, total_rows)
+        return True
+    finally:
+        if wb:
+            cleanup_workbook(wb)
+
+# available export backends. both produce the same sheet layout
+#   openpyxl: write-only openpyxl workbook
+#   ooxml: writes the xlsx xml directly, around 100x faster for large patterns (see benchmarks/bench_export.py)
+export_backends = {
+    "openpyxl": write_pattern_openpyxl,
+    "ooxml": write_pattern_ooxml,
+}
+default_export_backend = "openpyxl"
+
+# IN: final output file path
+# OUT: path of a new empty temporary file next to it. exports are written there and renamed over the output file once
+# complete, so the output file is never left half written (by a failure, a cancel or a crash)
+def get_temporary_output_path(output_file_path):
+    file_descriptor, temporary_path = mkstemp(suffix=".xlsx.tmp", prefix=".", dir=path.dirname(output_file_path) or ".")
+    close(file_descriptor)
+    return temporary_path
+
+# the umask can only be read by setting it, which changes it for every thread of the process. read it once at import,
+# before any export thread runs
+def get_process_umask():
+    umask = os.umask(0)
+    os.umask(umask)
+    return umask
+
+process_umask = get_process_umask()
+
+# mkstemp creates the temporary file readable by its owner only, and the rename keeps that. give it the permissions of
+# the file it replaces, or the usual ones for a new file (0666 minus the umask), before it is renamed into place
+def copy_output_permissions(temporary_path, output_file_path):
+    try:
+        mode = stat.S_IMODE(os.stat(output_file_path).st_mode)
+    except FileNotFoundError:
+        mode = 0o666 & ~process_umask
+    os.chmod(temporary_path, mode)
+
+def remove_file_quietly(file_path):
+    try:
+        remove(file_path)
+    except OSError:
+        pass
+
+# DESC: Export an image as an excel pattern, one cell per pixel, with an optional row number column on each side and a color legend
+# IN: output directory, output file name (no extension), IndexedPattern (or PIL image), export flags, export backend name,
+#     optional progress callback(rows done, total rows) and cancel event (threading.Event) for exports run in a worker,
+#     and optional error callback(message) called with the reason when the export fails
+# OUT: boolean indicating success. a cancelled export returns False and leaves no file behind
+# the file is written to a temporary file and renamed into place, so an existing file is only replaced by a complete one
+@instrumented("export")
+def export_image_as_excel_pattern(csv_output_directory, output_file_name, image, include_pixel_numbers = False, include_row_numbers = True, backend = default_export_backend, progress = None, cancel_event = None, on_error = None):
+    temporary_path = None
+
+    def report_error(message):
+        print(f"Error during export: {message}")
+        if on_error: on_error(message)
+        return False
+
+    try:
+        image_to_export = image
+
+        if image_to_export == None: return False
+
+        if backend not in export_backends:
+            return report_error(f"unknown export backend '{backend}'. Options: {', '.join(export_backends)}")
+
+        # get palette and color map from final pattern
+        if isinstance(image_to_export, IndexedPattern):
+            pattern = image_to_export.compact()
+        else:
+            pattern = IndexedPattern.from_image(image_to_export)
+
+        print("Exporting pattern to Excel")
+
+        # save the file
+        check_output_directory(csv_output_directory)
+        output_file_path = path.join(csv_output_directory, output_file_name + ".xlsx")
+        temporary_path = get_temporary_output_path(output_file_path)
+        progress_throttle = ProgressThrottle(progress, export_progress_interval)
+        export_backends[backend](temporary_path, get_sheet_name(output_file_name), pattern, include_pixel_numbers, include_row_numbers, progress_throttle.update, cancel_event)
+        copy_output_permissions(temporary_path, output_file_path)
+        try:
+            replace(temporary_path, output_file_path)
+        except PermissionError as e:
+            # the usual cause on windows: the file being replaced is open in excel
+            return report_error(f"Could not replace '{output_file_name}.xlsx'. Make sure it is not already open on computer. ({str(e)})")
+        temporary_path = None
+        print("Export complete!")
+        print(f"File '{output_file_name}.xlsx' created at location: '{output_file_path}'")
+        return True
+    except OperationCancelled:
+        print("Export cancelled")
+        return False
+    except Exception as e:
+        return report_error(str(e))
+    finally:
+        if temporary_path != None:
+            remove_file_quietly(temporary_path)
+
+# ---------- Import ----------
+
+white_rgb = (255, 255, 255)
+
+# IN: openpyxl fill
+# OUT: rgb tuple of the fill color. cells without a solid rgb fill read as white
+def get_fill_rgb(fill):
+    rgb = white_rgb  # default to white
+    if fill and fill.fill_type is not None and fill.start_color is not None:
+        color = fill.start_color
+        # openpyxl color can be indexed or rgb
+        if color.type == "rgb" and color.rgb is not None:
+            hexstr = color.rgb
+            # openpyxl may return ARGB, so skip first two chars if length 8
+            if len(hexstr) == 8:
+                hexstr = hexstr[2:]
+            try:
+                rgb = tuple(int(hexstr[i:i+2], 16) for i in (0, 2, 4))
+            except Exception:
+                rgb = white_rgb
+    return rgb
+
+# Import a pattern from Excel, specifying the rectangular region by start_cell and end_cell (e.g., "B1", "BX75").
+# IN: excel file path, start cell, end cell
+# OUT: IndexedPattern, or None if the import failed
+# the workbook is opened read-only and streamed one row at a time. each distinct cell style is resolved to a fill color
+# once, and every cell after that is a dictionary lookup straight to a palette index
+@instrumented("import")
+def import_pattern_from_excel(filepath, start_cell, end_cell):
+    wb = None
+    try:
+        wb = load_workbook(filepath, read_only=True, data_only=True)
+        ws = wb.active
+
+        # Parse start and end cell coordinates
+        start_col_name, start_row = coordinate_from_string(start_cell.upper())
+        end_col_name, end_row = coordinate_from_string(end_cell.upper())
+        start_col = column_index_from_string(start_col_name)
+        end_col = column_index_from_string(end_col_name)
+        start_row = int(start_row)
+        end_row = int(end_row)
+
+        # Ensure correct order (top-left to bottom-right)
+        min_row, max_row = min(start_row, end_row), max(start_row, end_row)
+        min_col, max_col = min(start_col, end_col), max(start_col, end_col)
+
+        width = max_col - min_col + 1
+        height = max_row - min_row + 1
+
+        # Read cell colors and build the palette index grid. white is palette index 0 so rows missing from the sheet
+        # read as white like any other empty cell. compact() drops it again if it is unused
+        palette = [white_rgb]
+        palette_index_by_rgb = {white_rgb: 0}
+        palette_index_by_style = {}
+        indices = np.zeros((height, width), dtype=np.int32)
+
+        def get_palette_index(cell):
+            # empty cells have no style id and read as white
+            style_id = getattr(cell, "_style_id", None)
+            palette_index = palette_index_by_style.get(style_id)
+            if palette_index is None:
+                rgb = get_fill_rgb(cell.fill)
+                if rgb not in palette_index_by_rgb:
+                    palette_index_by_rgb[rgb] = len(palette)
+                    palette.append(rgb)
+                palette_index = palette_index_by_style[style_id] = palette_index_by_rgb[rgb]
+            return palette_index
+
+        for y, row in enumerate(ws.iter_rows(min_row=min_row, max_row=max_row, min_col=min_col, max_col=max_col)):
+            indices[y] = [get_palette_index(cell) for cell in row]
+
+        pattern = IndexedPattern(palette, indices).compact()
+
+        print("Pattern imported from Excel successfully!")
+        print(f"File path: '{filepath}'")
+
+        return pattern
+
+    except Exception as e:
+        print(f"Error importing pattern from Excel: {e}")
+        return None
+    finally:
+        if wb:
+            cleanup_workbook(wb)
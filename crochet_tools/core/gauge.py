@@ -0,0 +1,48 @@
+from crochet_tools.core.config import default_gauge_stitches, default_gauge_rows, min_dimension_input, max_dimension_input
+
+# ---------- Gauge ----------
+
+# crochet gauge: how many stitches and how many rows make 10 cm of fabric. one pattern cell is one stitch, and a
+# stitch is usually not square, so a pattern with the proportions of the photo needs its number of rows scaled by
+# the stitch shape. otherwise the finished piece comes out stretched.
+# the pixelation takes each stitch from a source block of the same non square shape in one pass (see pixelate.py),
+# so the pattern is never resized square first and stretched after
+class Gauge:
+    def __init__(self, stitches=default_gauge_stitches, rows=default_gauge_rows):
+        self.stitches = float(stitches) # per 10 cm
+        self.rows = float(rows) # per 10 cm
+
+    # width of a stitch over its height. above 1 for stitches that are wider than tall
+    @property
+    def stitch_aspect(self):
+        return self.rows / self.stitches
+
+    # IN: source image size (width, height), pattern width in stitches
+    # OUT: number of rows that gives the fabric the proportions of the image
+    def get_rows(self, image_size, width):
+        image_width, image_height = image_size
+        return max(min_dimension_input, round(width * image_height / image_width * self.stitch_aspect))
+
+    # IN: source image size (width, height), pattern height in rows
+    # OUT: number of stitches that gives the fabric the proportions of the image
+    def get_stitches(self, image_size, height):
+        image_width, image_height = image_size
+        return max(min_dimension_input, round(height * image_width / image_height / self.stitch_aspect))
+
+# IN: source image size (width, height), pattern width and height (either one may be None), Gauge (default gauge if None)
+# OUT: (width, height) of the pattern. a missing dimension is derived from the other one, the image proportions and the
+# gauge. if it would come out above max_dimension_input, it is set to the maximum and the given dimension is scaled
+# down to match, so a tall image or gauge never gives a pattern that is too big
+def get_grid_size(image_size, width=None, height=None, gauge=None):
+    gauge = gauge or Gauge()
+    if height == None:
+        height = gauge.get_rows(image_size, width)
+        if height > max_dimension_input:
+            height = max_dimension_input
+            width = min(width, gauge.get_stitches(image_size, height))
+    elif width == None:
+        width = gauge.get_stitches(image_size, height)
+        if width > max_dimension_input:
+            width = max_dimension_input
+            height = min(height, gauge.get_rows(image_size, width))
+    return (width, height)
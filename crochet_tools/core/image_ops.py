@@ -0,0 +1,164 @@
+import numpy as np
+from PIL import Image
+from crochet_tools.core.progress import ProgressThrottle
+from crochet_tools.core.config import preview_size, proxy_oversample, max_color_input
+from crochet_tools.core.cache import result_cache, get_image_digest
+from crochet_tools.core.palette_tree import PaletteTree
+from crochet_tools.core.quantizers import quantizers, default_quantizer
+from crochet_tools.core.pixelate import pixelate, default_pixelation_method
+from crochet_tools.core.instrumentation import instrumented
+
+# ---------- Image Processing ----------
+
+# long side of the preview proxy for a source image: big enough to fill the display box and to give every stitch of
+# the target grid proxy_oversample source pixels in each direction, but never bigger than the source itself
+# IN: PIL image, target width and height in stitches (None if not known yet)
+# OUT: long side in pixels
+def get_proxy_long_side(image, width=None, height=None):
+    if image == None: return
+    source_long_side = max(image.size)
+    scale = preview_size / source_long_side
+    if width and height:
+        scale = max(scale, proxy_oversample * width / image.width, proxy_oversample * height / image.height)
+    return min(source_long_side, int(round(scale * source_long_side)))
+
+# downsample an image so its long side is long_side pixels. returns the image itself if it is already small enough.
+# the color sliders and pixelation run on this proxy, so their cost does not depend on the size of the source photo
+@instrumented("make_proxy")
+def make_proxy(image, long_side):
+    if image == None: return
+    if long_side >= max(image.size): return image
+    ratio = long_side / max(image.size)
+    new_size = (max(1, round(image.width * ratio)), max(1, round(image.height * ratio)))
+    return image.resize(new_size, Image.Resampling.LANCZOS, reducing_gap=3.0)
+
+# weights PIL uses to convert rgb to "L" (luma)
+luma_weights = np.array([0.299, 0.587, 0.114])
+
+# brightness, contrast and saturation in two C passes (a lookup table and a color matrix) instead of three
+# ImageEnhance passes, without ImageEnhance's full size degenerate images. gives the same result as running
+# ImageEnhance.Brightness, .Contrast and .Color one after the other, within 1 per channel.
+# brightness and contrast are the same curve for every channel, so together they are one 256 entry lookup table.
+# saturation blends each pixel with its own luma, which is a single 3x3 color matrix
+@instrumented("apply_color_sliders")
+def apply_color_sliders(image, brightness, contrast, saturation):
+    if image == None: return
+
+    # brightness: blend with black. PIL blends in float32 and truncates, so do the same to match it exactly
+    levels = np.arange(256, dtype=np.float32)
+    brightness_lut = np.clip(np.trunc(levels * np.float32(brightness)), 0, 255)
+
+    # contrast: blend with the mean luma of the brightness adjusted image. this is the only step that needs the
+    # brightness adjusted pixels, and only as a small "L" image to take the mean of
+    brightness_image = image if brightness == 1.0 else image.point(brightness_lut.astype(np.uint8).tolist() * 3)
+    luma_histogram = np.array(brightness_image.convert("L").histogram(), dtype=np.float64)
+    mean = int(float(luma_histogram @ np.arange(256)) / luma_histogram.sum() + 0.5)
+    color_lut = np.clip(np.trunc(np.float32(mean) + np.float32(contrast) * (brightness_lut - np.float32(mean))), 0, 255)
+
+    img = image.point(color_lut.astype(np.uint8).tolist() * 3)
+    if saturation == 1.0:
+        return img
+
+    # saturation: blend each pixel with its luma. out = saturation * rgb + (1 - saturation) * luma
+    # PIL rounds matrix conversions, so the -0.5 offset turns that into the truncation ImageEnhance uses
+    saturation_matrix = saturation * np.eye(3) + (1 - saturation) * np.outer(np.ones(3), luma_weights)
+    matrix = tuple(np.hstack([saturation_matrix, np.full((3, 1), -0.5)]).ravel().tolist())
+    return img.convert("RGB", matrix)
+
+# reduce the image to one pixel per stitch
+# IN: PIL image, width and height in stitches, pixelation method name (see pixelate.py)
+# OUT: rgb PIL image of width x height
+@instrumented("pixelate_image")
+def pixelate_image(image, width, height, method=default_pixelation_method):
+    if image == None: return
+    return pixelate(image, width, height, method)
+
+# reduce the image to num_colors colors
+# IN: PIL image, number of colors, quantizer name (see quantizers.py)
+# OUT: IndexedPattern holding the palette and one palette index per pixel
+@instrumented("quantize")
+def quantize_to_pattern(image, num_colors, quantizer=default_quantizer):
+    if image == None: return
+    return quantizers[quantizer](image, num_colors)
+
+# pixelate_image and quantize_to_pattern behind the shared result cache. results are keyed by the content of the input
+# image and the parameters, so going back to a previous setting (e.g. flipping the number of colors between 3 and 5)
+# returns the earlier result instead of recomputing it. cached results are shared, so callers must not modify them
+# no pixelation method set means the default one
+def cached_pixelate_image(image, width, height, method=None):
+    if image == None: return
+    method = method or default_pixelation_method
+    key = ("pixelate", get_image_digest(image), width, height, method)
+    return result_cache.get_or_compute(key, lambda: pixelate_image(image, width, height, method))
+
+def cached_quantize_to_pattern(image, num_colors, quantizer=default_quantizer):
+    if image == None: return
+    key = ("quantize", get_image_digest(image), num_colors, quantizer)
+    return result_cache.get_or_compute(key, lambda: quantize_to_pattern(image, num_colors, quantizer))
+
+# palette merge tree of an image (see palette_tree.py). built once per pixelated image, then any number of colors is a lookup
+# only built for the tree quantizer
+def cached_palette_tree(image, quantizer=None):
+    if image == None or (quantizer or default_quantizer) != "tree": return
+    return get_cached_palette_tree(image)
+
+# the timed part of cached_palette_tree, so the "palette_tree" stage is only recorded when the tree quantizer is in use
+@instrumented("palette_tree")
+def get_cached_palette_tree(image):
+    key = ("palette_tree", get_image_digest(image), max_color_input)
+    return result_cache.get_or_compute(key, lambda: PaletteTree(image, max_color_input))
+
+@instrumented("palette_tree_lookup")
+def get_tree_pattern(tree, num_colors):
+    if tree == None: return
+    return tree.get_pattern(num_colors)
+
+# pipeline stage for lvl2: the tree quantizer reads the pattern off the cached palette tree, the others go through
+# cached_quantize_to_pattern. no quantizer set means the default one
+def get_quantized_pattern(image, tree, num_colors, quantizer=None):
+    quantizer = quantizer or default_quantizer
+    if quantizer == "tree":
+        return get_tree_pattern(tree, num_colors)
+    return cached_quantize_to_pattern(image, num_colors, quantizer)
+
+# same as quantize_to_pattern, but returns an rgb PIL image
+def quantize_image(image, num_colors, quantizer=default_quantizer):
+    if image == None: return
+    return quantize_to_pattern(image, num_colors, quantizer).to_rgb_image()
+
+"""
+take an image and shift the pixels to account for how the colors will shift when crocheting.
+the angle of alternating rows will shift the colors slightly, so we shift them here in the pattern so that crocheting shifts them back into place.
+below we list all of the rules according to which we shift pixels
+1. only operate on odd rows
+2. 
+3. 
+4. 
+"""
+pixel_shift_rows_per_block = 64
+
+# IN: IndexedPattern, optional progress callback(rows done, total rows)
+# OUT: new IndexedPattern with the shifted pixels
+# the shift is done with array slicing on the index grid, a block of rows at a time, so progress can be reported
+@instrumented("pixel_shift")
+def pixel_shift(pattern, progress=None):
+    original_pattern = pattern
+
+    if original_pattern == None: return
+    pixel_shifted_pattern = original_pattern.copy()
+    original = original_pattern.indices
+    shifted = pixel_shifted_pattern.indices
+
+    height = pixel_shifted_pattern.height
+    progress_throttle = ProgressThrottle(progress)
+    for block_start in range(0, height, pixel_shift_rows_per_block):
+        block_end = min(block_start + pixel_shift_rows_per_block, height)
+        # odd rows in this block. first block row is rounded up to the next odd row
+        odd_rows = slice(block_start | 1, block_end, 2)
+        # rule 1: on odd rows, each pixel takes the previous pixel's value (shift right by one, first pixel unchanged)
+        shifted[odd_rows, 1:] = original[odd_rows, :-1]
+        progress_throttle.update(block_end, height)
+
+    print("Pixel shift complete!")
+
+    return pixel_shifted_pattern
@@ -0,0 +1,75 @@
+import numpy as np
+from PIL import Image
+from crochet_tools.core.pattern import get_color_arrays, pack_rgb, unpack_rgb
+
+# ---------- Indexed Pattern ----------
+
+# a pattern stored the way PIL stores a "P" mode image: a small palette plus one palette index per stitch.
+# quantization produces one of these once, and display, pixel shift, legend and export all read it directly
+# instead of converting back to a full rgb image and re-discovering the palette from the pixels.
+# palette: (N, 3) uint8 array of rgb colors
+# indices: (H, W) uint8 array of palette indices (row major, top row first)
+class IndexedPattern:
+    def __init__(self, palette, indices):
+        self.palette = np.asarray(palette, dtype=np.uint8).reshape(-1, 3)
+        self.indices = np.asarray(indices)
+
+    @property
+    def width(self):
+        return self.indices.shape[1]
+
+    @property
+    def height(self):
+        return self.indices.shape[0]
+
+    @property
+    def size(self):
+        return (self.width, self.height)
+
+    @property
+    def num_colors(self):
+        return len(self.palette)
+
+    def copy(self):
+        return IndexedPattern(self.palette.copy(), self.indices.copy())
+
+    # build a pattern from any PIL image. colors are numbered in order of first appearance (see get_color_arrays)
+    @classmethod
+    def from_image(cls, image):
+        colors, color_map, used_colors = get_color_arrays(image)
+        return cls(used_colors, color_map)
+
+    # build a pattern from a "P" mode PIL image without looking at the rgb values of every pixel
+    @classmethod
+    def from_palette_image(cls, image):
+        palette = np.array(image.getpalette("RGB"), dtype=np.uint8).reshape(-1, 3)
+        return cls(palette, np.asarray(image, dtype=np.uint8)).compact()
+
+    # "P" mode PIL image sharing this pattern's palette. cheap to resize and display
+    def to_image(self):
+        if self.num_colors > 256:
+            return Image.fromarray(self.to_rgb_array(), "RGB")
+        image = Image.fromarray(self.indices.astype(np.uint8), "P")
+        image.putpalette(self.palette.tobytes(), "RGB")
+        return image
+
+    def to_rgb_image(self):
+        return Image.fromarray(self.to_rgb_array(), "RGB")
+
+    # (H, W, 3) uint8 rgb array
+    def to_rgb_array(self):
+        return self.palette[self.indices]
+
+    # merge duplicate palette colors, drop unused ones and renumber the rest in order of first appearance
+    # (left column to right column, top row to bottom row), which is how colors are numbered in the exported pattern
+    def compact(self):
+        unique_packed, palette_to_unique = np.unique(pack_rgb(self.palette), return_inverse=True)
+        indices = palette_to_unique[self.indices]
+
+        used, first_index = np.unique(indices.T.ravel(), return_index=True)
+        used = used[np.argsort(first_index)]
+        renumber = np.zeros(len(unique_packed), dtype=np.int64)
+        renumber[used] = np.arange(len(used))
+
+        map_dtype = np.uint8 if len(used) <= 256 else np.int32
+        return IndexedPattern(unpack_rgb(unique_packed[used]), renumber[indices].astype(map_dtype))
@@ -0,0 +1,121 @@
+import json
+import threading
+import tracemalloc
+from functools import wraps
+from time import perf_counter
+
+# ---------- Stage Instrumentation ----------
+
+# per stage call counts, wall time and (optionally) peak traced memory for the instrumented functions below.
+# disabled by default: an instrumented function then costs one attribute check per call. enable with
+# enable_instrumentation(), read with get_stage_stats() or write with dump_stage_stats()
+class StageStats:
+    def __init__(self):
+        self.calls = 0
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+        self.last_seconds = 0.0
+        self.peak_bytes = None # largest peak traced memory of one call, None if memory tracing was never on
+
+    def record(self, seconds, peak_bytes):
+        self.calls += 1
+        self.total_seconds += seconds
+        self.max_seconds = max(self.max_seconds, seconds)
+        self.last_seconds = seconds
+        if peak_bytes != None:
+            self.peak_bytes = max(self.peak_bytes or 0, peak_bytes)
+
+    def to_dict(self):
+        return {
+            "calls": self.calls,
+            "total_seconds": self.total_seconds,
+            "mean_seconds": self.total_seconds / self.calls if self.calls else 0.0,
+            "max_seconds": self.max_seconds,
+            "last_seconds": self.last_seconds,
+            "peak_bytes": self.peak_bytes,
+        }
+
+class InstrumentationState:
+    def __init__(self):
+        self.enabled = False
+        self.trace_memory = False
+        self.stats = {} # stage name -> StageStats
+        self.lock = threading.Lock()
+        # running traced calls as [traced memory at start, highest peak seen]. tracemalloc has a single peak counter
+        # that every call resets, so a finishing call passes its peak on to the calls still running around it
+        self.traced_calls = []
+
+instrumentation = InstrumentationState()
+
+# IN: whether to also record peak allocated bytes with tracemalloc (slows everything down noticeably while on).
+# tracemalloc sees python and numpy allocations, but not the pixel buffers of PIL images
+def enable_instrumentation(trace_memory=False):
+    instrumentation.trace_memory = trace_memory
+    if trace_memory and not tracemalloc.is_tracing():
+        tracemalloc.start()
+    instrumentation.enabled = True
+
+def disable_instrumentation():
+    instrumentation.enabled = False
+    if instrumentation.trace_memory and tracemalloc.is_tracing():
+        tracemalloc.stop()
+    instrumentation.trace_memory = False
+
+def reset_stage_stats():
+    with instrumentation.lock:
+        instrumentation.stats.clear()
+
+# OUT: dict of stage name -> dict of stats (see StageStats.to_dict), sorted by stage name
+def get_stage_stats():
+    with instrumentation.lock:
+        return {name: instrumentation.stats[name].to_dict() for name in sorted(instrumentation.stats)}
+
+# IN: output file path
+# OUT: boolean indicating success
+def dump_stage_stats(output_file_path):
+    try:
+        with open(output_file_path, "w") as output_file:
+            json.dump(get_stage_stats(), output_file, indent=2)
+        return True
+    except Exception as e:
+        print(f"Error saving stage stats: {str(e)}")
+        return False
+
+def begin_traced_call():
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.reset_peak()
+    traced_call = [current, current]
+    with instrumentation.lock:
+        instrumentation.traced_calls.append(traced_call)
+    return traced_call
+
+def end_traced_call(traced_call):
+    _, peak = tracemalloc.get_traced_memory()
+    with instrumentation.lock:
+        instrumentation.traced_calls.remove(traced_call)
+        for running_call in instrumentation.traced_calls:
+            running_call[1] = max(running_call[1], peak)
+    return max(traced_call[1], peak) - traced_call[0]
+
+# decorator: record calls of the function under the given stage name while instrumentation is enabled
+def instrumented(stage_name):
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            if not instrumentation.enabled:
+                return func(*args, **kwargs)
+
+            traced_call = begin_traced_call() if instrumentation.trace_memory and tracemalloc.is_tracing() else None
+            start = perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                seconds = perf_counter() - start
+                peak_bytes = end_traced_call(traced_call) if traced_call != None else None
+                with instrumentation.lock:
+                    stage_stats = instrumentation.stats.get(stage_name)
+                    if stage_stats == None:
+                        stage_stats = instrumentation.stats[stage_name] = StageStats()
+                    stage_stats.record(seconds, peak_bytes)
+        return wrapper
+    return decorator
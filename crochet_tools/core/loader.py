@@ -0,0 +1,44 @@
+from math import ceil
+from PIL import Image
+from crochet_tools.core.config import max_dimension_input, proxy_oversample
+from crochet_tools.core.instrumentation import instrumented
+
+# ---------- Source Image Loading ----------
+
+# the largest pattern is max_dimension_input stitches in either direction and the proxy wants proxy_oversample source
+# pixels per stitch (see get_proxy_long_side), so a source never needs more than this many pixels on its short side
+source_min_short_side = proxy_oversample * max_dimension_input
+
+# a loaded source image: a working copy reduced to what any pattern can use, plus the size of the original, which
+# sets the proportions of the pattern
+class SourceImage:
+    def __init__(self, file_path, image, full_size):
+        self.file_path = file_path
+        self.image = image # rgb PIL image, short side at least source_min_short_side (or the full image if smaller)
+        self.full_size = full_size # (width, height) of the original
+
+# IN: image size, minimum short side
+# OUT: largest integer factor the image can be reduced by and keep its short side at least min_short_side
+def get_reduce_factor(size, min_short_side):
+    return max(1, min(size) // min_short_side)
+
+# DESC: open an image reduced to the resolution patterns can use
+# IN: image file path, minimum short side of the result
+# OUT: SourceImage
+# jpegs are decoded straight at a reduced DCT scale (1/2, 1/4 or 1/8) with draft(), which skips most of the decoding
+# work and never holds the full resolution pixels. other formats are decoded once and reduced with an integer box
+# filter, so only the reduced copy stays in memory
+@instrumented("load")
+def load_source_image(file_path, min_short_side=source_min_short_side):
+    with Image.open(file_path) as image:
+        full_size = image.size
+        if image.format == "JPEG":
+            # draft picks the smallest scale that is still at least the requested size
+            scale = min(1.0, min_short_side / min(full_size))
+            image.draft("RGB", (ceil(full_size[0] * scale), ceil(full_size[1] * scale)))
+        working = image.convert("RGB")
+
+    factor = get_reduce_factor(working.size, min_short_side)
+    if factor > 1:
+        working = working.reduce(factor)
+    return SourceImage(file_path, working, full_size)
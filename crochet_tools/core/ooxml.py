@@ -0,0 +1,161 @@
+from zipfile import ZipFile, ZIP_DEFLATED
+from xml.sax.saxutils import escape, quoteattr
+import numpy as np
+from crochet_tools.core.config import column_size, legend_buffer, legend_headers, export_rows_per_check
+from crochet_tools.core.cells import get_column
+from crochet_tools.core.pattern import get_font_color, rgb_to_hex
+from crochet_tools.core.progress import check_cancelled
+
+# ---------- Direct OOXML Pattern Writer ----------
+
+# writes the .xlsx zip container, styles.xml and sheet1.xml directly, without openpyxl.
+# the layout matches the openpyxl export backend cell for cell. each palette color gets one cellXfs entry, so the xml
+# for a stitch is a fixed string per palette index and each row is just those strings joined in index grid order.
+
+main_namespace = "http://schemas.openxmlformats.org/spreadsheetml/2006/main"
+relationships_namespace = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+xml_declaration = '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+
+content_types_xml = xml_declaration + (
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/xl/workbook.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+    '<Override PartName="/xl/worksheets/sheet1.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+    '<Override PartName="/xl/styles.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"/>'
+    '</Types>'
+)
+
+root_rels_xml = xml_declaration + (
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" Target="xl/workbook.xml"/>'
+    '</Relationships>'
+)
+
+workbook_rels_xml = xml_declaration + (
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" Target="worksheets/sheet1.xml"/>'
+    '<Relationship Id="rId2" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/styles" Target="styles.xml"/>'
+    '</Relationships>'
+)
+
+# fixed cellXfs ids. palette color k uses pattern_style_start + k for stitches and legend_style_start + k for its legend swatch
+default_style = 0
+row_number_right_style = 1
+row_number_left_style = 2
+pattern_style_start = 3
+
+def build_workbook_xml(sheet_name):
+    return xml_declaration + (
+        f'<workbook xmlns="{main_namespace}" xmlns:r="{relationships_namespace}">'
+        f'<sheets><sheet name={quoteattr(sheet_name)} sheetId="1" r:id="rId1"/></sheets>'
+        '</workbook>'
+    )
+
+# IN: (N, 3) palette
+# OUT: styles.xml with one font, one fill and two cellXfs entries (stitch and legend swatch) per palette color
+def build_styles_xml(palette):
+    num_colors = len(palette)
+    fonts = ['<font><sz val="11"/><name val="Calibri"/></font>']
+    fills = ['<fill><patternFill patternType="none"/></fill>', '<fill><patternFill patternType="gray125"/></fill>']
+    for color_rgb in palette.tolist():
+        cell_color = "FF" + rgb_to_hex(color_rgb).upper()
+        fonts.append(f'<font><sz val="11"/><color rgb="{get_font_color(color_rgb)}"/><name val="Calibri"/></font>')
+        fills.append(f'<fill><patternFill patternType="solid"><fgColor rgb="{cell_color}"/><bgColor rgb="{cell_color}"/></patternFill></fill>')
+
+    xfs = [
+        '<xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0"/>',
+        '<xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0" applyAlignment="1"><alignment horizontal="right"/></xf>',
+        '<xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0" applyAlignment="1"><alignment horizontal="left"/></xf>',
+    ]
+    for k in range(num_colors):
+        xfs.append(f'<xf numFmtId="0" fontId="{k + 1}" fillId="{k + 2}" borderId="1" xfId="0" applyFont="1" applyFill="1" applyBorder="1" applyAlignment="1"><alignment horizontal="center"/></xf>')
+    for k in range(num_colors):
+        xfs.append(f'<xf numFmtId="0" fontId="{k + 1}" fillId="{k + 2}" borderId="0" xfId="0" applyFont="1" applyFill="1"/>')
+
+    return xml_declaration + (
+        f'<styleSheet xmlns="{main_namespace}">'
+        f'<fonts count="{len(fonts)}">{"".join(fonts)}</fonts>'
+        f'<fills count="{len(fills)}">{"".join(fills)}</fills>'
+        '<borders count="2">'
+        '<border><left/><right/><top/><bottom/><diagonal/></border>'
+        '<border><left style="thin"/><right style="thin"/><top style="thin"/><bottom style="thin"/><diagonal/></border>'
+        '</borders>'
+        '<cellStyleXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0"/></cellStyleXfs>'
+        f'<cellXfs count="{len(xfs)}">{"".join(xfs)}</cellXfs>'
+        '<cellStyles count="1"><cellStyle name="Normal" xfId="0" builtinId="0"/></cellStyles>'
+        '</styleSheet>'
+    )
+
+def string_cell_xml(cell_name, value, style=default_style):
+    style_attribute = f' s="{style}"' if style else ''
+    return f'<c r="{cell_name}"{style_attribute} t="inlineStr"><is><t>{escape(str(value))}</t></is></c>'
+
+# legend cells for one row of the sheet: the header on row 0, then one row per palette color
+def build_legend_row_xml(palette, row, legend_columns, include_pixel_numbers):
+    row_name = str(row + 1)
+    if row == 0:
+        return "".join(string_cell_xml(get_column(legend_columns + i) + row_name, header) for i, header in enumerate(legend_headers))
+    color_symbol = row - 1
+    color_rgb = palette[color_symbol].tolist()
+    color_hex = rgb_to_hex(color_rgb)
+    swatch_style = pattern_style_start + len(palette) + color_symbol
+    if include_pixel_numbers:
+        swatch = string_cell_xml(get_column(legend_columns) + row_name, color_symbol, swatch_style)
+    else:
+        swatch = f'<c r="{get_column(legend_columns)}{row_name}" s="{swatch_style}"/>'
+    values = [color_hex, color_rgb[0], color_rgb[1], color_rgb[2]]
+    return swatch + "".join(string_cell_xml(get_column(legend_columns + 1 + i) + row_name, value) for i, value in enumerate(values))
+
+# DESC: write an IndexedPattern as an excel pattern file without openpyxl
+# IN: output file path, sheet name, IndexedPattern, export flags, optional progress callback(rows done, total rows)
+#     and cancel event
+# OUT: True once written. raises OperationCancelled if the cancel event is set while writing, and any error writing the
+# file as is, so export_image_as_excel_pattern can report it
+def write_pattern_ooxml(output_file_path, sheet_name, pattern, include_pixel_numbers = False, include_row_numbers = True, progress = None, cancel_event = None):
+    width, height = pattern.size
+    num_colors = pattern.num_colors
+    image_first_column = 2 if include_row_numbers else 1
+    legend_column = width + (2 if include_row_numbers else 1) + legend_buffer + 1
+    legend_rows = num_colors + 1
+    right_row_number_column = get_column(width + 2)
+
+    # one fixed xml string per palette color. stitches are contiguous within a row, so they can leave out the cell
+    # reference and let excel count columns from the previous cell
+    stitch_xml = np.array([
+        f'<c s="{pattern_style_start + k}"><v>{k}</v></c>' if include_pixel_numbers else f'<c s="{pattern_style_start + k}"/>'
+        for k in range(num_colors)
+    ], dtype=object)
+
+    with ZipFile(output_file_path, "w", compression=ZIP_DEFLATED, compresslevel=1) as zf:
+        zf.writestr("[Content_Types].xml", content_types_xml)
+        zf.writestr("_rels/.rels", root_rels_xml)
+        zf.writestr("xl/workbook.xml", build_workbook_xml(sheet_name))
+        zf.writestr("xl/_rels/workbook.xml.rels", workbook_rels_xml)
+        zf.writestr("xl/styles.xml", build_styles_xml(pattern.palette))
+
+        with zf.open("xl/worksheets/sheet1.xml", "w") as sheet:
+            sheet.write((xml_declaration + f'<worksheet xmlns="{main_namespace}">'
+                '<sheetFormatPr defaultRowHeight="15"/>'
+                f'<cols><col min="{image_first_column}" max="{image_first_column + width - 1}" width="{column_size}" customWidth="1"/></cols>'
+                '<sheetData>').encode("utf-8"))
+
+            total_rows = max(height, legend_rows)
+            for y in range(0, total_rows):
+                if y % export_rows_per_check == 0:
+                    check_cancelled(cancel_event)
+                    if progress: progress(y, total_rows)
+                row_name = str(y + 1)
+                row = [f'<row r="{row_name}">']
+                if y < height:
+                    if include_row_numbers: row.append(string_cell_xml("A" + row_name, height - y, row_number_right_style))
+                    row.append("".join(stitch_xml[pattern.indices[y]]))
+                    if include_row_numbers: row.append(string_cell_xml(right_row_number_column + row_name, height - y, row_number_left_style))
+                if y < legend_rows:
+                    row.append(build_legend_row_xml(pattern.palette, y, legend_column, include_pixel_numbers))
+                row.append('</row>')
+                sheet.write("".join(row).encode("utf-8"))
+
+            sheet.write(b'</sheetData></worksheet>')
+    if progress: progress(total_rows, total_rows)
+    return True
@@ -0,0 +1,104 @@
+import numpy as np
+from crochet_tools.core.config import max_color_input
+from crochet_tools.core.indexed_pattern import IndexedPattern
+from crochet_tools.core.pattern import pack_rgb, unpack_rgb
+
+# ---------- Palette Merge Tree ----------
+
+# median cut, but recorded as a tree of splits so it only has to run once per image. the first k - 1 splits give the
+# k color palette for any k up to max_colors, so changing the number of colors is a walk up the tree (O(k)) and one
+# lookup table remap of the pixels instead of a new palette generation.
+# each split takes the box of colors with the largest squared error (weighted by pixel count) and cuts it at the
+# weighted median of its widest channel. a box's color is the pixel weighted mean of the colors in it.
+class PaletteTree:
+    def __init__(self, image, max_colors=max_color_input):
+        colors = np.asarray(image.convert("RGB"), dtype=np.uint8)
+        self.height, self.width = colors.shape[:2]
+
+        # work on the distinct colors of the image and their pixel counts instead of on every pixel
+        unique_packed, self.pixel_colors, counts = np.unique(pack_rgb(colors).ravel(), return_inverse=True, return_counts=True)
+        unique_colors = unpack_rgb(unique_packed).astype(np.float64)
+        counts = counts.astype(np.float64)
+
+        # nodes of the tree. node 0 is the box holding every color
+        self.parent = [-1]
+        self.created_step = [0]
+        self.node_colors = [get_box_color(unique_colors, counts, np.arange(len(unique_colors)))]
+        leaves = {0: np.arange(len(unique_colors))} # leaf node -> indices of the unique colors in it
+        leaf_errors = {0: get_box_error(unique_colors, counts, leaves[0])}
+
+        num_splits = 0
+        while len(leaves) < max_colors:
+            # split the leaf with the largest error. boxes holding a single color cannot be split
+            splittable = [node for node in leaves if len(leaves[node]) > 1]
+            if not splittable:
+                break
+            node = max(splittable, key=lambda n: leaf_errors[n])
+            members = leaves.pop(node)
+            leaf_errors.pop(node)
+            num_splits += 1
+
+            low, high = split_box(unique_colors, counts, members)
+            for child_members in (low, high):
+                child = len(self.parent)
+                self.parent.append(node)
+                self.created_step.append(num_splits)
+                self.node_colors.append(get_box_color(unique_colors, counts, child_members))
+                leaves[child] = child_members
+                leaf_errors[child] = get_box_error(unique_colors, counts, child_members)
+
+        self.num_splits = num_splits
+        self.max_colors = num_splits + 1
+        # finest leaf of every unique color
+        self.finest_leaf = np.zeros(len(unique_colors), dtype=np.int64)
+        for node, members in leaves.items():
+            self.finest_leaf[members] = node
+        self.finest_leaves = sorted(leaves)
+        self.node_colors = np.array(self.node_colors, dtype=np.uint8)
+
+    # approximate memory held by the tree, for the result cache
+    @property
+    def nbytes(self):
+        return self.pixel_colors.nbytes + self.finest_leaf.nbytes + self.node_colors.nbytes
+
+    # IN: number of colors
+    # OUT: IndexedPattern with at most num_colors colors
+    def get_pattern(self, num_colors):
+        splits_done = min(max(num_colors, 1), self.max_colors) - 1
+
+        # the ancestor of each finest leaf that is a leaf after splits_done splits
+        level_index_of_node = {}
+        level_index_of_finest_leaf = np.zeros(len(self.parent), dtype=np.int64)
+        for leaf in self.finest_leaves:
+            node = leaf
+            while self.created_step[node] > splits_done:
+                node = self.parent[node]
+            if node not in level_index_of_node:
+                level_index_of_node[node] = len(level_index_of_node)
+            level_index_of_finest_leaf[leaf] = level_index_of_node[node]
+
+        palette = self.node_colors[list(level_index_of_node)]
+        unique_color_to_index = level_index_of_finest_leaf[self.finest_leaf]
+        indices = unique_color_to_index[self.pixel_colors].reshape(self.height, self.width)
+        return IndexedPattern(palette, indices.astype(np.uint8)).compact()
+
+def get_box_color(colors, counts, members):
+    weights = counts[members]
+    return np.round(weights @ colors[members] / weights.sum())
+
+def get_box_error(colors, counts, members):
+    weights = counts[members]
+    box_colors = colors[members]
+    mean = weights @ box_colors / weights.sum()
+    return float(weights @ ((box_colors - mean) ** 2).sum(axis=1))
+
+# cut a box of colors in two at the pixel weighted median of its widest channel
+def split_box(colors, counts, members):
+    box_colors = colors[members]
+    channel = int(np.argmax(box_colors.max(axis=0) - box_colors.min(axis=0)))
+    order = np.argsort(box_colors[:, channel], kind="stable")
+    cumulative = np.cumsum(counts[members][order])
+    split = int(np.searchsorted(cumulative, cumulative[-1] / 2))
+    # both halves need at least one color
+    split = min(max(split + 1, 1), len(members) - 1)
+    return members[order[:split]], members[order[split:]]
@@ -0,0 +1,68 @@
+import numpy as np
+from crochet_tools.core.instrumentation import instrumented
+
+# ---------- Pattern Colors ----------
+
+# IN: PIL image
+# OUT: (H, W, 3) uint8 array with each value containing an rgb color
+# OUT: (H, W) array with each value containing an int representing the color map value
+# OUT: (N, 3) uint8 array of the used colors, indexed by color map value
+# color map values are numbered in order of first appearance, scanning left column to right column and top row to bottom row
+@instrumented("get_colors")
+def get_color_arrays(image):
+    colors = np.asarray(image.convert("RGB"), dtype=np.uint8)
+    height, width = colors.shape[:2]
+
+    # pack each rgb pixel into one int so np.unique can work on a flat array. transpose so the scan order is column by column
+    packed = pack_rgb(colors).T.ravel()
+    unique_packed, first_index, inverse = np.unique(packed, return_index=True, return_inverse=True)
+
+    # np.unique sorts by value, so renumber the colors by first appearance
+    order = np.argsort(first_index)
+    rank = np.empty_like(order)
+    rank[order] = np.arange(len(order))
+    map_dtype = np.uint8 if len(order) <= 256 else np.int32
+    color_map = rank[inverse].astype(map_dtype).reshape(width, height).T
+
+    used_colors = unpack_rgb(unique_packed[order])
+
+    return colors, color_map, used_colors
+
+# IN: PIL image
+# OUT: 2D array with each value containing a rgb tuple
+# OUT: 2D array with each value containing an int representing the color map value
+# both are lists of columns (indexed [x][y]). kept for callers that want the original list based shape
+def get_colors(image):
+    colors, color_map, used_colors = get_color_arrays(image)
+    return color_arrays_to_columns(colors, color_map)
+
+# convert (H, W, 3) colors and (H, W) color map arrays into the list of columns shape returned by get_colors
+def color_arrays_to_columns(colors, color_map):
+    colors = [list(map(tuple, column)) for column in colors.transpose(1, 0, 2).tolist()]
+    color_map = color_map.T.tolist()
+    return colors, color_map
+
+# (..., 3) uint8 rgb array -> (...) uint32 array of 0xRRGGBB values
+def pack_rgb(colors):
+    colors = colors.astype(np.uint32)
+    return (colors[..., 0] << 16) | (colors[..., 1] << 8) | colors[..., 2]
+
+# (...) array of 0xRRGGBB values -> (..., 3) uint8 rgb array
+def unpack_rgb(packed):
+    packed = np.asarray(packed, dtype=np.uint32)
+    return np.stack([(packed >> 16) & 0xFF, (packed >> 8) & 0xFF, packed & 0xFF], axis=-1).astype(np.uint8)
+
+def get_font_color(cell_color):
+    r = cell_color[0]
+    g = cell_color[1]
+    b = cell_color[2]
+    luma = 0.299*r + 0.587*g + 0.114*b
+    luma = luma / 255.0 # Account for rgb scale being 0-255 instead of 0-1.0
+    if luma > 0.7: # Cell is very bright
+        return "00000000" # Black
+    else: # Cell is very dark
+        return "FFFFFFFF" # White
+
+def rgb_to_hex(color):
+    # Note: Have color[3] for alpha for future expansion.
+    return '%02x%02x%02x' % (color[0], color[1], color[2])
@@ -0,0 +1,83 @@
+from crochet_tools.core.yarn_chart import get_yarn_pattern
+from crochet_tools.core.image_ops import get_proxy_long_side, make_proxy, apply_color_sliders, cached_pixelate_image, cached_palette_tree, get_quantized_pattern
+
+# ---------- Incremental Pipeline ----------
+
+# a small dependency graph of processing stages. each stage names its inputs (parameters or other stages) and caches
+# its output together with the versions of those inputs. asking for a stage only recomputes it when one of its inputs
+# changed since the last time it ran, so changing a parameter only reruns the stages downstream of it.
+class Pipeline:
+    def __init__(self):
+        self.params = {}
+        self.stages = {} # name -> (func, input names)
+        self.versions = {} # param or stage name -> int, bumped every time its value changes
+        self.cache = {} # stage name -> (input versions, output)
+
+    def add_stage(self, name, func, inputs):
+        self.stages[name] = (func, list(inputs))
+        self.versions[name] = 0
+
+    # set a parameter. setting the same value again does not invalidate anything downstream.
+    # numbers and strings compare by value, anything else (images, patterns) by identity
+    def set_param(self, name, value):
+        if name in self.params and same_value(self.params[name], value):
+            return
+        self.params[name] = value
+        self.versions[name] = self.versions.get(name, 0) + 1
+
+    def set_params(self, **params):
+        for name, value in params.items():
+            self.set_param(name, value)
+
+    # current version of a parameter or stage. bringing a stage up to date may recompute it, which bumps its version
+    def get_version(self, name):
+        if name in self.stages:
+            self.get(name)
+        return self.versions.get(name, 0)
+
+    # value of a parameter or stage, recomputing stale stages on the way
+    def get(self, name):
+        if name not in self.stages:
+            return self.params.get(name)
+
+        func, inputs = self.stages[name]
+        input_versions = tuple(self.get_version(i) for i in inputs)
+        cached = self.cache.get(name)
+        if cached != None and cached[0] == input_versions:
+            return cached[1]
+
+        output = func(*[self.get(i) for i in inputs])
+        # a recomputed stage that produced the same simple value (e.g. a size) does not invalidate anything downstream
+        if cached == None or not same_value(cached[1], output):
+            self.versions[name] += 1
+        self.cache[name] = (input_versions, output)
+        return output
+
+def same_value(a, b):
+    if a is b:
+        return True
+    if isinstance(a, (int, float, str, bool, tuple)) and type(a) == type(b):
+        return a == b
+    return False
+
+# the image levels used by the GUI and the batch tools:
+#   params: source (lvl0 image), brightness, contrast, saturation, width, height, pixelation (see pixelate.py), num_colors, quantizer (see quantizers.py), use_yarn_colors
+#   proxy: source downsampled for preview (see get_proxy_long_side). only rebuilt when the source or the needed size changes
+#   lvl1: proxy with the color sliders applied
+#   pixelated: lvl1 reduced to width x height stitches with the chosen pixelation method
+#   palette_tree: median cut merge tree of pixelated (see palette_tree.py), built once per pixelated image. tree quantizer only
+#   lvl2: pixelated reduced to num_colors colors (IndexedPattern) with the chosen quantizer. the tree quantizer reads it off the palette tree
+#   lvl3: final pattern: lvl2, with its colors replaced by the closest yarn chart colors if use_yarn_colors is set
+# pixelated, palette_tree and the other quantizers also go through the shared result cache, so revisiting an earlier setting is instant
+# changing num_colors only reruns lvl2 and lvl3 (a lookup into the tree), changing width or height skips the color sliders, and so on.
+# the proxy always has at least proxy_oversample pixels per stitch, so the pattern never needs a full resolution pass
+def build_pattern_pipeline():
+    pipeline = Pipeline()
+    pipeline.add_stage("proxy_long_side", get_proxy_long_side, ["source", "width", "height"])
+    pipeline.add_stage("proxy", make_proxy, ["source", "proxy_long_side"])
+    pipeline.add_stage("lvl1", apply_color_sliders, ["proxy", "brightness", "contrast", "saturation"])
+    pipeline.add_stage("pixelated", cached_pixelate_image, ["lvl1", "width", "height", "pixelation"])
+    pipeline.add_stage("palette_tree", cached_palette_tree, ["pixelated", "quantizer"])
+    pipeline.add_stage("lvl2", get_quantized_pattern, ["pixelated", "palette_tree", "num_colors", "quantizer"])
+    pipeline.add_stage("lvl3", get_yarn_pattern, ["lvl2", "use_yarn_colors"])
+    return pipeline
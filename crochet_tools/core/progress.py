@@ -0,0 +1,29 @@
+from time import monotonic
+
+# ---------- Progress Reporting ----------
+
+# wraps a progress callback(done, total) so it is called at most once every min_interval seconds.
+# the final update (done == total) is always passed through, so callers always see completion.
+class ProgressThrottle:
+    def __init__(self, callback, min_interval=0.25):
+        self.callback = callback
+        self.min_interval = min_interval
+        self.last_update = None
+
+    def update(self, done, total):
+        if self.callback == None: return
+        now = monotonic()
+        if done < total and self.last_update != None and now - self.last_update < self.min_interval:
+            return
+        self.last_update = now
+        self.callback(done, total)
+
+# raised by long running operations when their cancel event is set
+class OperationCancelled(Exception):
+    pass
+
+# IN: threading.Event or None
+# raises OperationCancelled if the event is set
+def check_cancelled(cancel_event):
+    if cancel_event != None and cancel_event.is_set():
+        raise OperationCancelled()
@@ -0,0 +1,40 @@
+from crochet_tools.core.config import max_color_input, min_color_input, max_dimension_input, min_dimension_input
+
+# validation helpers return an error message string when the input is invalid, or None when it is valid.
+# callers decide how to surface the message (console, message box, exception in a batch job, etc.)
+
+def get_dimensions_error(width, height):
+    ## Check if height and width are numbers
+    if not str(width).isnumeric():
+        return "Error: Width contains non-numeric characters."
+    if not str(height).isnumeric():
+        return "Error: Height contains non-numeric characters."
+    ## Check if height in width are within the desired range
+    width = int(width)
+    height = int(height)
+    if width < min_dimension_input or width > max_dimension_input:
+        return "Error: Width '" + str(width) + "' not valid. Must be between " + str(min_dimension_input) + " and " + str(max_dimension_input) + "."
+    if height < min_dimension_input or height > max_dimension_input:
+        return "Error: Height '" + str(height) + "' not valid. Must be between " + str(min_dimension_input) + " and " + str(max_dimension_input) + "."
+    return None
+
+def get_gauge_error(stitches, rows):
+    ## Check if both are positive numbers (decimals allowed, e.g. 16.5 stitches per 10 cm)
+    for name, value in (("Gauge stitches", stitches), ("Gauge rows", rows)):
+        try:
+            number = float(value)
+        except (TypeError, ValueError):
+            return "Error: " + name + " '" + str(value) + "' is not a number."
+        if not number > 0:
+            return "Error: " + name + " '" + str(value) + "' not valid. Must be more than 0."
+    return None
+
+def get_num_colors_error(num_colors):
+    ## Check if number is numeric
+    if not str(num_colors).isnumeric():
+        return "Error: Number of Colors contains non-numeric characters."
+    ## Check if in desired range
+    num_colors = int(num_colors)
+    if num_colors < min_color_input or num_colors > max_color_input:
+        return "Error: Number of Colors '" + str(num_colors) + "' not valid. Must be between "  + str(min_color_input) + " and " + str(max_color_input)
+    return None
@@ -0,0 +1,63 @@
+import threading
+
+# ---------- Background Worker ----------
+
+# runs compute(request) on a background thread with "latest wins" coalescing. submitting a new request while another is
+# waiting replaces the waiting one, so however fast requests come in (e.g. a slider being dragged), the worker only
+# ever computes the newest one after the current job finishes. results are kept until take_result() collects them,
+# and only the newest result is kept. compute is only ever called from the worker thread.
+class LatestWinsWorker:
+    def __init__(self, compute, name="pipeline-worker"):
+        self.compute = compute
+        self.lock = threading.Lock()
+        self.wake = threading.Event()
+        self.pending = None
+        self.has_pending = False
+        self.result = None
+        self.busy = False
+        self.stopped = False
+        self.thread = threading.Thread(target=self.run, name=name, daemon=True)
+        self.thread.start()
+
+    def submit(self, request):
+        with self.lock:
+            self.pending = request
+            self.has_pending = True
+            self.wake.set()
+
+    # OUT: (request, result, error) for the newest finished request, or None if nothing new finished
+    def take_result(self):
+        with self.lock:
+            result = self.result
+            self.result = None
+            return result
+
+    def is_idle(self):
+        with self.lock:
+            return not self.busy and not self.has_pending
+
+    def stop(self):
+        self.stopped = True
+        self.wake.set()
+
+    def run(self):
+        while True:
+            self.wake.wait()
+            if self.stopped: return
+            with self.lock:
+                request = self.pending
+                self.pending = None
+                self.has_pending = False
+                self.busy = True
+                self.wake.clear()
+
+            result = None
+            error = None
+            try:
+                result = self.compute(request)
+            except Exception as e:
+                error = e
+
+            with self.lock:
+                self.result = (request, result, error)
+                self.busy = False
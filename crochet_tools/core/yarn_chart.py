@@ -0,0 +1,132 @@
+import threading
+from os import path
+import numpy as np
+from openpyxl import load_workbook
+from crochet_tools.core.config import color_chart_path, color_chart_cache_path
+from crochet_tools.core.indexed_pattern import IndexedPattern
+from crochet_tools.core.color_science import get_nearest_colors
+from crochet_tools.core.instrumentation import instrumented
+
+# ---------- Yarn Color Chart ----------
+
+# the DMC chart is compiled once into a numpy .npz next to it (codes, names, colors and a 32x32x32 rgb -> chart index
+# lookup table). the compiled file records the size and modification time of the spreadsheet it came from (and a format version) and is
+# rebuilt when they no longer match. loaded charts are also kept in memory. a palette (at most max_color_input colors)
+# is matched with the exact nearest color search, which takes a few milliseconds; the lookup table is for per pixel
+# lookups over whole images, where one table lookup per pixel is what keeps them fast.
+lut_bits = 5 # bits per channel of the lookup table, 32 levels per channel
+lut_levels = 1 << lut_bits
+chart_match_metric = "ciede2000"
+chart_format_version = 3 # bump when the compiled layout or the matching changes, so old compiled charts are rebuilt
+
+class YarnChart:
+    def __init__(self, codes, names, colors, lut=None):
+        self.codes = np.asarray(codes, dtype=str)
+        self.names = np.asarray(names, dtype=str)
+        self.colors = np.asarray(colors, dtype=np.uint8).reshape(-1, 3)
+        self.lut = build_chart_lut(self.colors) if lut is None else np.asarray(lut)
+
+    def __len__(self):
+        return len(self.colors)
+
+    # IN: (..., 3) rgb colors
+    # OUT: (...) index of the chart color for each color, through the lookup table: one array index per color. every
+    # color gets the chart color closest to the center of its 8x8x8 block of rgb values, which is usually (about 80% of
+    # the time on photos) the exact match and otherwise a chart color only slightly further away
+    def get_lut_indices(self, colors):
+        colors = np.asarray(colors, dtype=np.uint8)
+        shift = 8 - lut_bits
+        return self.lut[colors[..., 0] >> shift, colors[..., 1] >> shift, colors[..., 2] >> shift]
+
+    # IN: IndexedPattern
+    # OUT: IndexedPattern with every palette color replaced by its closest chart color. palette colors that land on the
+    # same chart color are merged
+    def match_pattern(self, pattern):
+        chart_indices = get_nearest_chart_indices(pattern.palette, self.colors)
+        return IndexedPattern(self.colors[chart_indices], pattern.indices).compact()
+
+# IN: (..., 3) rgb colors, (N, 3) chart colors
+# OUT: (...) index of the closest chart color of each color by CIEDE2000 (see color_science.py)
+def get_nearest_chart_indices(colors, chart_colors):
+    return get_nearest_colors(colors, chart_colors, chart_match_metric)
+
+# lookup table of the closest chart color for the center of every block of rgb values. exact, so it takes a few
+# seconds, once per compile of the chart
+def build_chart_lut(chart_colors):
+    block = 1 << (8 - lut_bits)
+    levels = np.arange(lut_levels) * block + block // 2
+    grid = np.stack(np.meshgrid(levels, levels, levels, indexing="ij"), axis=-1)
+    return get_nearest_chart_indices(grid, chart_colors).astype(np.uint16)
+
+# IN: chart spreadsheet path
+# OUT: YarnChart read from the spreadsheet. rows without a full rgb value are skipped
+def read_chart_spreadsheet(chart_path):
+    wb = load_workbook(chart_path, read_only=True, data_only=True)
+    try:
+        codes, names, colors = [], [], []
+        for row in wb.worksheets[0].iter_rows(values_only=True):
+            if len(row) < 5 or not all(isinstance(v, (int, float)) for v in row[2:5]):
+                continue
+            codes.append(str(row[0]))
+            names.append(str(row[1]))
+            colors.append((int(row[2]), int(row[3]), int(row[4])))
+        return YarnChart(codes, names, colors)
+    finally:
+        wb.close()
+
+def get_chart_signature(chart_path):
+    return np.array([chart_format_version, path.getsize(chart_path), path.getmtime(chart_path)], dtype=np.float64)
+
+def save_compiled_chart(chart, cache_path, signature):
+    try:
+        with open(cache_path, "wb") as cache_file:
+            np.savez(cache_file, codes=chart.codes, names=chart.names, colors=chart.colors, lut=chart.lut, signature=signature)
+    except OSError as e:
+        print(f"Warning: could not save compiled color chart: {str(e)}")
+
+def load_compiled_chart(cache_path, signature):
+    if not path.isfile(cache_path):
+        return None
+    try:
+        with np.load(cache_path) as compiled:
+            if not np.array_equal(compiled["signature"], signature):
+                return None
+            return YarnChart(compiled["codes"], compiled["names"], compiled["colors"], compiled["lut"])
+    except Exception:
+        return None # unreadable or from an older layout, rebuild it
+
+loaded_charts = {} # chart path -> (signature, YarnChart)
+loaded_charts_lock = threading.Lock()
+
+# DESC: get the yarn color chart, compiling the spreadsheet only when it changed since the last compile
+# IN: chart spreadsheet path, compiled chart path
+# OUT: YarnChart, or None if the chart could not be loaded
+def get_yarn_chart(chart_path=color_chart_path, cache_path=color_chart_cache_path):
+    try:
+        signature = get_chart_signature(chart_path)
+        with loaded_charts_lock:
+            loaded = loaded_charts.get(chart_path)
+            if loaded is not None and np.array_equal(loaded[0], signature):
+                return loaded[1]
+
+            chart = load_compiled_chart(cache_path, signature)
+            if chart is None:
+                print(f"Compiling color chart '{chart_path}'")
+                chart = read_chart_spreadsheet(chart_path)
+                save_compiled_chart(chart, cache_path, signature)
+            loaded_charts[chart_path] = (signature, chart)
+            return chart
+    except Exception as e:
+        print(f"Error: color chart loading failed. Make sure '{chart_path}' is present and not open. ({str(e)})")
+        return None
+
+# pipeline stage for lvl3: the pattern with its colors replaced by the closest yarn colors when use_yarn_colors is set
+@instrumented("yarn_colors")
+def get_yarn_pattern(pattern, use_yarn_colors=False):
+    if pattern == None: return
+    if not use_yarn_colors:
+        return pattern.copy()
+    chart = get_yarn_chart()
+    if chart is None:
+        return pattern.copy()
+    return chart.match_pattern(pattern)
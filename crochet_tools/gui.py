@@ -19,16 +19,40 @@ SOFTWARE.
 # ---------- Import Libraries ----------
 
 import sys
-from io import TextIOWrapper
-from os import path, mkdir
+import queue
+import threading
 import customtkinter as ctk
 from tkinter import filedialog
-from PIL import Image, ImageTk, ImageEnhance
+from PIL import Image, ImageTk
 from tkinter import messagebox
-from openpyxl import styles, Workbook, load_workbook
-from openpyxl.utils import column_index_from_string
-from openpyxl.utils.cell import coordinate_from_string, column_index_from_string
-from string import ascii_uppercase
+from crochet_tools.core import (
+    csv_output_directory,
+    preview_size,
+    get_dimensions_error,
+    get_num_colors_error,
+    get_gauge_error,
+    default_gauge_stitches,
+    default_gauge_rows,
+    Gauge,
+    get_grid_size,
+    quantizers,
+    default_quantizer,
+    pixelation_methods,
+    default_pixelation_method,
+    build_pattern_pipeline,
+    LatestWinsWorker,
+    IndexedPattern,
+    pixel_shift,
+    export_image_as_excel_pattern,
+    import_pattern_from_excel,
+    load_source_image,
+    instrumented,
+    enable_instrumentation,
+    disable_instrumentation,
+    reset_stage_stats,
+    get_stage_stats,
+    dump_stage_stats,
+)
 
 # ---------- Global Variables ----------
 
@@ -39,15 +63,10 @@ color_base = "#217346"
 window_width = 1600
 window_height = 900
 
-# Functionality
-csv_output_directory = "input_output"
-max_color_input = 32
-min_color_input = 1
-max_dimension_input = 500
-min_dimension_input = 1
-
 # ---------- Global State ----------
 
+# lvl0 and lvl1 are PIL images. lvl2 and up are IndexedPatterns (palette + index grid)
+source_image = None # SourceImage of the loaded file
 image_lvl0 = None # original
 image_lvl1 = None
 image_lvl2 = None
@@ -55,53 +74,101 @@ image_lvl3 = None
 image_lvl4 = None
 image_lvl5 = None
 
+# pipeline that computes lvl1 to lvl3 from lvl0 and the control values, caching each stage
+pipeline = build_pattern_pipeline()
+# display sized render of each level, as stage name -> ((stage version, pixel aspect), PIL image). a level is only
+# resized again when its stage has a new version, so e.g. lvl0 is rendered once per loaded file, not on every slider move
+display_renders = {}
+# one PhotoImage per image label, as label -> PhotoImage. updated in place with paste() while its size and mode stay the same
+label_photos = {}
+# bumped every time a file is loaded, used as the version of lvl0
+source_version = 0
+# last values of the width / height / colors / gauge entries that triggered an update
+last_entry_values = None
+# gauge of the last pattern sent to the pipeline. the step 2 preview draws the stitches in its proportions
+current_gauge = Gauge()
+
+# ms between checks for finished pipeline results
+pipeline_poll_interval = 30
+
+# excel export running in the background (see export_pattern), or None. only one export runs at a time
+export_job = None
+# ms between export progress bar updates, so it redraws at most 10 times per second
+export_poll_interval = 100
+
+# ms between stats panel refreshes while stage stats are being recorded
+stats_refresh_interval = 1000
+
 # define list of console text boxes across our application so we can add them as they are created
 console_box_list = []
+# ms between console text box updates, and the number of lines each box keeps
+console_flush_interval = 50
+console_max_lines = 1000
 
 
 # ---------- Classes ----------
 
-# custom stream class that will handle the redirection of standard and error output to a text box on the UI console.
-# handles streaming to multiple text boxes contained in a list
-class MultiTextBoxRedirector:
+# stdout sink for the console text boxes. write() only queues the text, so it is cheap and safe to call from any
+# thread (pipeline worker, export worker). the Tk thread moves everything queued into the boxes once per
+# console_flush_interval ms in flush_to_textboxes, with one insert per box and old lines trimmed in one delete
+class QueuedConsoleSink:
     def __init__(self, textboxes):
         self.textboxes = textboxes  # List of textboxes
+        self.pending = queue.SimpleQueue()
 
     def add_textbox(self, textbox):
         if textbox not in self.textboxes:
             self.textboxes.append(textbox)
 
     def write(self, string):
+        self.pending.put(string)
+
+    def flush(self):
+        pass
+
+    # runs on the Tk thread
+    def flush_to_textboxes(self):
+        chunks = []
+        while True:
+            try:
+                chunks.append(self.pending.get_nowait())
+            except queue.Empty:
+                break
+        if not chunks: return
+        text = "".join(chunks)
         for textbox in self.textboxes:
             textbox.configure(state="normal")
-            textbox.insert("end", string)
-            textbox.see("end")
-            textbox.update()
-            # keep only last 1000 lines
+            textbox.insert("end", text)
+            # keep only the last console_max_lines lines
             line_count = int(textbox.index('end-1c').split('.')[0])
-            if line_count > 1000:
-                textbox.delete("1.0", "2.0")
+            if line_count > console_max_lines:
+                textbox.delete("1.0", f"{line_count - console_max_lines + 1}.0")
+            textbox.see("end")
             textbox.configure(state="disabled")
 
-    def flush(self):
-        pass
-
 
 # ---------- Functions ----------
 
-def resize_for_display(image, max_size=500):
+# pixel_aspect is the width over the height of one pixel on screen, e.g. the stitch aspect for a pattern
+def resize_for_display(image, max_size=500, pixel_aspect=1.0):
     if image == None: return
     # Resize image maintaining aspect ratio to fit within max_size x max_size
-    ratio = min(max_size/image.width, max_size/image.height)
-    new_size = (int(image.width * ratio), int(image.height * ratio))
+    ratio = min(max_size/(image.width * pixel_aspect), max_size/image.height)
+    new_size = (max(1, int(image.width * pixel_aspect * ratio)), max(1, int(image.height * ratio)))
     return image.resize(new_size, Image.Resampling.NEAREST)
 
 def select_file():
-    global image_lvl0, image_lvl1, image_lvl2, image_lvl3
+    global source_image, source_version, image_lvl0, last_entry_values
     filepath = filedialog.askopenfilename(filetypes=[("Image files", "*.jpg *.png *.jpeg")])
     if filepath:
-        image_lvl0 = Image.open(filepath).convert("RGB")
-        update_image_display(image_lvl0, image_lvl0_image_label)
+        # lvl0 is the source reduced to what any pattern can use
+        source_image = load_source_image(filepath)
+        image_lvl0 = source_image.image
+        source_version += 1
+        update_level_display("lvl0", source_version, image_lvl0, image_lvl0_image_label)
+        if keep_proportions_var.get():
+            update_derived_dimension()
+        last_entry_values = get_entry_values()
         update_all_levels()
         print(f"Image file loaded:\n'{filepath}'")
 
@@ -114,32 +181,67 @@ def reset_sliders():
     update_all_levels()
 
 
-# updates display for a given image. does not update it in memory
-def update_image_display(image, image_label):
+# display sized PIL image for a given image or IndexedPattern
+def render_for_display(image, pixel_aspect=1.0):
     if image == None: return
+    if isinstance(image, IndexedPattern):
+        image = image.to_image()
+    return resize_for_display(image, max_size=preview_size, pixel_aspect=pixel_aspect)
+
+# show a display sized PIL image on a label. the label's PhotoImage is reused when the size and mode are unchanged, so
+# a slider tick copies pixels into the existing Tk image instead of allocating a new one and dropping the old one
+def show_display_image(display_img, image_label):
+    photo, size, mode = label_photos.get(image_label, (None, None, None))
+    if photo != None and size == display_img.size and mode == display_img.mode:
+        photo.paste(display_img)
+        return
+    photo = ImageTk.PhotoImage(display_img)
+    label_photos[image_label] = (photo, display_img.size, display_img.mode)
+    image_label.configure(image=photo)
+    image_label.image = photo
 
-    display_img = resize_for_display(image, max_size=500)
-    img_tk_new = ImageTk.PhotoImage(display_img)
-    image_label.configure(image=img_tk_new)
-    image_label.image = img_tk_new
-
-def process_lvl0_to_lvl1():
-    global image_lvl0, image_lvl1, image_lvl1_image_label
-    new_image = image_lvl0.copy()
-    # apply color sliders
-    new_image = apply_color_sliders(new_image)
-    # update image_lvl1 in memory
-    image_lvl1 = new_image
-    # update image_lvl1 on the UI display
-    update_image_display(image_lvl1, image_lvl1_image_label)
-
-def process_lvl1_to_lvl2():
-    global image_lvl1, image_lvl2, image_lvl2_image_label
-
+# updates display for a given image or IndexedPattern. does not update it in memory
+@instrumented("update_image_display")
+def update_image_display(image, image_label):
+    if image == None: return
+    show_display_image(render_for_display(image), image_label)
+
+# run on the pipeline worker thread. sets the requested parameters and brings the requested stages up to date
+# IN: (params dict, list of stage names, Gauge the request was made with). the gauge is only for the display of the result
+# OUT: dict of stage name -> (stage version, stage output)
+def compute_levels(request):
+    params, stage_names, gauge = request
+    pipeline.set_params(**params)
+    return {name: (pipeline.get_version(name), pipeline.get(name)) for name in stage_names}
+
+# background thread that runs compute_levels, always on the newest request
+pipeline_worker = LatestWinsWorker(compute_levels)
+
+# refresh a level's display only if its pipeline stage has a new output since it was last shown. the display sized
+# render is kept per stage version (and pixel aspect), so an unchanged level is never resized or copied to Tk again
+@instrumented("update_level_display")
+def update_level_display(stage_name, version, image, image_label, pixel_aspect=1.0):
+    if image == None: return
+    rendered_key, display_img = display_renders.get(stage_name, (None, None))
+    if rendered_key == (version, pixel_aspect): return
+    display_img = render_for_display(image, pixel_aspect)
+    display_renders[stage_name] = ((version, pixel_aspect), display_img)
+    show_display_image(display_img, image_label)
+
+# parameters for lvl0 -> lvl1 (apply color sliders)
+def get_lvl1_params():
+    return dict(source=image_lvl0, brightness=brightness_slider.get(), contrast=contrast_slider.get(), saturation=saturation_slider.get())
+
+# parameters for lvl1 -> lvl2 (pixelate, then quantize), or None if the entries are not valid
+def get_lvl2_params():
+    global current_gauge
     if not dimensions_valid(width_entry.get(), height_entry.get()):
-        return None, None
+        return None
     if not num_colors_valid(colors_entry.get()):
-        return None, None
+        return None
+    if not gauge_valid(gauge_stitches_entry.get(), gauge_rows_entry.get()):
+        return None
+    current_gauge = Gauge(gauge_stitches_entry.get(), gauge_rows_entry.get())
     
     try:
         width = int(width_entry.get())
@@ -147,371 +249,201 @@ def process_lvl1_to_lvl2():
         num_colors = int(colors_entry.get())
     except ValueError:
         print("Invalid width/height/colors")
-        return
-    
-    new_image = image_lvl1.copy()
-    # pixelate image (resize)
-    new_image = pixelate_image(new_image, width, height)
-    # quantize (reduce color palette)
-    new_image = quantize_image(new_image, num_colors)
-    # update image_lvl2 in memory
-    image_lvl2 = new_image
-    # update image_lvl2 on the UI display
-    update_image_display(image_lvl2, image_lvl2_image_label)
-
-# currently unused
-def process_lvl2_to_lvl3():
-    global image_lvl2, image_lvl3
-    # curently does nothing
-    new_image = image_lvl2.copy()
-    # update image_lvl3 in memory
-    image_lvl3 = new_image
-    # update image_lvl3 on the UI display
-    #update_image_display(image_lvl3, image_lvl3_image_label)
-
-# def process_lvl4_to_lvl5():
-#     global image_lvl4, image_lvl5
-#     # curently does nothing
-#     new_image = image_lvl4.copy()
-#     # perform pixel shifting
-#     new_image = pixel_shift(new_image)
-#     # update image_lvl3 in memory
-#     image_lvl5 = new_image
-#     # update image_lvl5 on the UI display
-#     update_image_display(image_lvl5, image_lvl5_image_label)
-
-def update_all_levels():
-    process_lvl0_to_lvl1()
-    process_lvl1_to_lvl2()
-    process_lvl2_to_lvl3()
-
-# def update_all_levels_tab1():
-#     process_lvl4_to_lvl5()
-
-def apply_color_sliders(image):
-    if image == None: return
+        return None
 
-    brightness = brightness_slider.get()
-    contrast = contrast_slider.get()
-    saturation = saturation_slider.get()
+    return dict(width=width, height=height, pixelation=pixelation_menu.get(), num_colors=num_colors, quantizer=quantizer_menu.get(), use_yarn_colors=use_yarn_colors_var.get())
 
-    img = image.copy()
-    img = ImageEnhance.Brightness(img).enhance(brightness)
-    img = ImageEnhance.Contrast(img).enhance(contrast)
-    img = ImageEnhance.Color(img).enhance(saturation)
+def process_lvl4_to_lvl5():
+    global image_lvl5
+    # perform pixel shifting
+    new_image = pixel_shift(image_lvl4)
+    if new_image == None: return
+    # update image_lvl5 in memory
+    image_lvl5 = new_image
+    # update image_lvl5 on the UI display
+    update_image_display(image_lvl5, image_lvl5_image_label)
 
-    return img
+# hand the current control values to the pipeline worker. this returns straight away; poll_pipeline_results shows the
+# new levels when they are ready. only the stages downstream of a changed parameter are recomputed (see build_pattern_pipeline)
+def update_all_levels():
+    if image_lvl0 == None: return
+    params = get_lvl1_params()
+    stage_names = ["lvl1"]
+    lvl2_params = get_lvl2_params()
+    if lvl2_params != None:
+        params.update(lvl2_params)
+        stage_names += ["lvl2", "lvl3"]
+    pipeline_worker.submit((params, stage_names, current_gauge))
+
+# runs on the Tk thread every pipeline_poll_interval ms and shows the newest finished pipeline result
+def poll_pipeline_results():
+    global image_lvl1, image_lvl2, image_lvl3
+    result = pipeline_worker.take_result()
+    if result != None:
+        (params, stage_names, gauge), outputs, error = result
+        if error != None:
+            print(f"Error updating images: {error}")
+        else:
+            if "lvl1" in outputs:
+                version, image_lvl1 = outputs["lvl1"]
+                update_level_display("lvl1", version, image_lvl1, image_lvl1_image_label)
+            if "lvl2" in outputs:
+                version, image_lvl2 = outputs["lvl2"]
+            # the step 2 preview shows the final pattern, so it includes the yarn colors when they are on
+            if "lvl3" in outputs:
+                version, image_lvl3 = outputs["lvl3"]
+                # drawn in the proportions of the fabric, so a non square gauge does not look stretched. uses the gauge
+                # the result was computed with, which the entries may have changed from since
+                update_level_display("lvl3", version, image_lvl3, image_lvl2_image_label, gauge.stitch_aspect)
+    app.after(pipeline_poll_interval, poll_pipeline_results)
+
+def get_entry_values():
+    return (width_entry.get(), height_entry.get(), colors_entry.get(), gauge_stitches_entry.get(), gauge_rows_entry.get())
+
+def set_entry_text(entry, text):
+    entry.delete(0, "end")
+    entry.insert(0, str(text))
+
+# set the height from the width (or the width from the height) so the finished piece has the proportions of the image
+# at the current gauge. invalid entries are left alone, update_all_levels reports them. when the derived one would be
+# too big, both are scaled down to fit (see get_grid_size)
+def update_derived_dimension(from_height=False):
+    if source_image == None: return
+    if get_gauge_error(gauge_stitches_entry.get(), gauge_rows_entry.get()): return
+    gauge = Gauge(gauge_stitches_entry.get(), gauge_rows_entry.get())
+    entry = height_entry if from_height else width_entry
+    if not entry.get().isnumeric() or int(entry.get()) < 1: return
+    if from_height:
+        width, height = get_grid_size(source_image.full_size, height=int(height_entry.get()), gauge=gauge)
+    else:
+        width, height = get_grid_size(source_image.full_size, width=int(width_entry.get()), gauge=gauge)
+    set_entry_text(width_entry, width)
+    set_entry_text(height_entry, height)
+
+# entries fire on both Enter and focus out, so only update when the entry values actually changed.
+# with keep proportions on, editing the width sets the height, editing the height sets the width, and editing the
+# gauge keeps the width and sets the height
+def on_entry_changed():
+    global last_entry_values
+    entry_values = get_entry_values()
+    if entry_values == last_entry_values: return
+    if last_entry_values != None and keep_proportions_var.get():
+        width_changed, height_changed = entry_values[0] != last_entry_values[0], entry_values[1] != last_entry_values[1]
+        gauge_changed = entry_values[3:] != last_entry_values[3:]
+        if height_changed and not width_changed:
+            update_derived_dimension(from_height=True)
+        elif width_changed or gauge_changed:
+            update_derived_dimension()
+        entry_values = get_entry_values()
+    last_entry_values = entry_values
+    update_all_levels()
 
-def pixelate_image(image, width, height):
-    if image == None: return
-    image_pixelated = image.resize((width, height))
-    return image_pixelated
+# turning keep proportions on sets the height from the width straight away
+def on_keep_proportions_changed():
+    global last_entry_values
+    if not keep_proportions_var.get(): return
+    update_derived_dimension()
+    last_entry_values = get_entry_values()
+    update_all_levels()
 
-def quantize_image(image, num_colors):
-    if image == None: return
-    if num_colors <= 32:
-        quantized_image = image.convert("P", palette=Image.ADAPTIVE, colors=num_colors, dither=0).convert("RGB")
-    return quantized_image
+# def update_all_levels_tab1():
+#     process_lvl4_to_lvl5()
 
-"""
-take an image and shift the pixels to account for how the colors will shift when crocheting.
-the angle of alternating rows will shift the colors slightly, so we shift them here in the pattern so that crocheting shifts them back into place.
-below we list all of the rules according to which we shift pixels
-1. only operate on odd rows
-2. 
-3. 
-4. 
-"""
-def pixel_shift():
-    global image_lvl4, image_lvl5, image_lvl5_image_label
-    original_image = image_lvl4
-    
-    if original_image == None: return
-    pixel_shifted_image = original_image.copy()
-    
-    # iterate through rows and then cols of pixels in pixel_shifted_image
-    width, height = pixel_shifted_image.size
-    for y in range(height):
-        for x in range(width):
-            pixel = pixel_shifted_image.getpixel((x, y))
-            print(f"row: {y+1}, col: {y+1}, pixel: {pixel}")
-            # proceed if y is an odd row
-            if y % 2 == 1:
-                # test. set current pixel to previous pixel's value
-                if x > 0:
-                    prev_pixel = original_image.getpixel((x - 1, y))
-                    pixel_shifted_image.putpixel((x, y), prev_pixel)
-            else:
-                pass
-            
-            # update image_lvl5 on the UI display
-            image_lvl5 = pixel_shifted_image
-            update_image_display(image_lvl5, image_lvl5_image_label)
-
-    print("Pixel shift complete!")
-
-    return pixel_shifted_image
+# show a validation error from the core engine in the console and in a message box
+def show_error(error_message):
+    print(error_message)
+    messagebox.showinfo(error_box_header, error_message)
 
 def dimensions_valid(width, height):
-    ## Check if height and width are numbers
-    if not width.isnumeric():
-        print("Error: Width contains non-numeric characters.")
-        messagebox.showinfo(error_box_header, "Error: Width contains non-numeric characters.")
-        return False
-    if not height.isnumeric():
-        print("Error: Height contains non-numeric characters.")
-        messagebox.showinfo(error_box_header, "Error: Height contains non-numeric characters.")
-        return False
-    ## Check if height in width are within the desired range
-    width = int(width)
-    height = int(height)
-    if width < min_dimension_input or width > max_dimension_input:
-        print("Error: Width '" + str(width) + "' not valid. Must be between " + str(min_dimension_input) + " and " + str(max_dimension_input) + ".")
-        messagebox.showinfo(error_box_header, "Error: Width '" + str(width) + "' not valid. Must be between " + str(min_dimension_input) + " and " + str(max_dimension_input) + ".")
+    error_message = get_dimensions_error(width, height)
+    if error_message:
+        show_error(error_message)
         return False
-    if height < min_dimension_input or height > max_dimension_input:
-        print("Error: Height '" + str(height) + "' not valid. Must be between " + str(min_dimension_input) + " and " + str(max_dimension_input) + ".")
-        messagebox.showinfo(error_box_header, "Error: Height '" + str(height) + "' not valid. Must be " + str(min_dimension_input) + " and " + str(max_dimension_input) + ".")
+    return True
+
+def gauge_valid(stitches, rows):
+    error_message = get_gauge_error(stitches, rows)
+    if error_message:
+        show_error(error_message)
         return False
     return True
 
 def num_colors_valid(num_colors):
-    ## Check if number is numeric
-    if not num_colors.isnumeric():
-        print("Error: Number of Colors contains non-numeric characters.")
-        messagebox.showinfo(error_box_header, "Error: Number of Colors contains non-numeric characters.")
-        return False
-    ## Check if in desired range
-    num_colors = int(num_colors)
-    if num_colors < min_color_input or num_colors > max_color_input:
-        print("Error: Number of Colors '" + str(num_colors) + "' not valid. Must be between "  + str(min_color_input) + " and " + str(max_color_input))
-        messagebox.showinfo(error_box_header, "Error: Number of Colors '" + str(num_colors) + "' not valid. Must be between "  + str(min_color_input) + " and " + str(max_color_input))
+    error_message = get_num_colors_error(num_colors)
+    if error_message:
+        show_error(error_message)
         return False
     return True
 
-# IN: PIL image
-# OUT: 2D array with each value containing a rgb tuple
-# OUT: 2D array with each value containing an int representing the color map value
-def get_colors(image):
-    used_colors = []
-    colors = []
-    color_map = []
-
-    for x in range(0, image.size[0]): # Left column to right column
-        column_colors = []
-        column_map = []
-        for y in range(0, image.size[1]): # Top row to bottom row
-            pixel_color = image.getpixel((x,y))
-            if(pixel_color not in used_colors):
-                used_colors.append(pixel_color)
-            pixel_map = used_colors.index(pixel_color)
-
-            column_colors.append(pixel_color)
-            column_map.append(pixel_map)
-        colors.append(column_colors)
-        color_map.append(column_map)
-
-    return colors, color_map
-
-def get_font_color(cell_color):
-    r = cell_color[0]
-    g = cell_color[1]
-    b = cell_color[2]
-    luma = 0.299*r + 0.587*g + 0.114*b
-    luma = luma / 255.0 # Account for rgb scale being 0-255 instead of 0-1.0
-    if luma > 0.7: # Cell is very bright
-        return "00000000" # Black
-    else: # Cell is very dark
-        return "FFFFFFFF" # White
-      
-def rgb_to_hex(color):
-    # Note: Have color[3] for alpha for future expansion.
-    return '%02x%02x%02x' % (color[0], color[1], color[2])
-
-def get_cell_name(x, y):
-    if x < 0:
-        return f"A{get_row(y)}"  # Left side row numbers
-    else:
-        return f"{get_column(x + 1)}{get_row(y)}"  # Normal cells and right side row numbers
-
-def get_column(num):
-    def divmod_excel(n):
-        a, b = divmod(n, 26)
-        if b == 0:
-            return a - 1, b + 26
-        return a, b
-
-    chars = []
-    while num > 0:
-        num, d = divmod_excel(num)
-        chars.append(ascii_uppercase[d - 1])
-    return ''.join(reversed(chars)).upper()
-
-def get_row(y):
-    return str(y + 1)
-
-def get_used_color_palette(colors, color_map):
-    used_colors = []
-    used_map = []
-
-    ## Get list of used colors
-    for x in range(0, len(colors)):
-        for y in range(0, len(colors[x])):
-            color = colors[x][y]
-            color_map_value = color_map[x][y]
-            if color not in used_colors:
-                used_colors.append(color)
-                used_map.append(color_map_value)
-
-    return used_colors, used_map
-
-def check_output_directory():
-    if not path.isdir(csv_output_directory):
-        mkdir(csv_output_directory)
-
-# DESC: Save the workbook as an excel file
-# IN: workbook, file path
-# OUT: boolean indicating success
-def save_wb(wb, output_file_path):
-    try:
-        wb.save(output_file_path)
-        return True
-    except Exception as e:
-        print(f"Error saving workbook: {str(e)}")
-        return False
-    finally:
-        try:
-            wb.close()
-        except Exception as e:
-            print(f"Warning: Error during workbook cleanup: {str(e)}")
-
-def cleanup_workbook(wb):
-    """Clean up workbook resources"""
-    try:
-        if wb:
-            wb.close()
-    except Exception as e:
-        print(f"Warning: Error during workbook cleanup: {str(e)}")
-
-# Add cleanup handler for application exit
-def on_app_exit():
-    """Handle cleanup when application exits"""
-    try:
-        # Add any additional cleanup needed here
-        pass
-    except Exception as e:
-        print(f"Warning: Error during application cleanup: {str(e)}")
+# export a pattern on a worker thread so the window stays responsive. progress_widgets is the (progress bar, cancel button)
+# pair of the tab the export was started from; they are shown while the export runs. see poll_export
+def export_pattern(output_file_name, image, progress_widgets, include_pixel_numbers = False, include_row_numbers = True):
+    global export_job
+    if image == None: return
+    if export_job != None:
+        print("An export is already running")
+        return
 
-def get_file_name_from_path(file_path):
-    return file_path.split("/")[-1]
+    job = dict(output_file_name=output_file_name, widgets=progress_widgets, cancel_event=threading.Event(), progress=(0, 1), result=None, error=None)
 
-def export_image_as_excel_pattern(csv_output_directory, output_file_name, image, include_pixel_numbers = False, include_row_numbers = True):
-    column_size = 2.8 # this number is about 20 pixels, same as the default height
-    cell_fill_type = 'solid'
-    legend_buffer = 2
-    wb = None
+    def set_progress(done, total):
+        job["progress"] = (done, total)
 
-    try:
-        image_to_export = image
-
-        if image_to_export == None: return
-
-        # get color grid and map from final image
-        colors, color_map = get_colors(image_to_export)
-
-        # create worksheet
-        wb = Workbook()
-        ws = wb.create_sheet(output_file_name, index=0)
-
-        print("Exporting pattern to Excel")
-
-        # if including row numbers column, fill column to left of image with row numbers
-        if include_row_numbers:
-            #ws.column_dimensions['A'].width = column_size
-            for y in range(0, len(colors[0])):
-                cell_name = get_cell_name(0, y)  # 0 for leftmost column
-                ws[cell_name].value = str(len(colors[0]) - y)  # Fill with descending numbers
-                ws[cell_name].alignment = styles.Alignment(horizontal='right')
-
-        # fill worksheet with image
-        for x in range(0, len(colors)):
-            print("Processing row: " +  str(x+1) + "/" + str(len(colors)))
-            for y in range(0, len(colors[x])):
-                cell_color = rgb_to_hex(colors[x][y])
-                font_color = get_font_color(colors[x][y])
-                cell_symbol = color_map[x][y]
-                cell_alignment = styles.Alignment(horizontal='center')
-                cell_fill = styles.PatternFill(fill_type=cell_fill_type, start_color=cell_color, end_color=cell_color)
-                cell_border = styles.Border(left=styles.Side(style='thin'), right=styles.Side(style='thin'), top=styles.Side(style='thin'), bottom=styles.Side(style='thin'))
-                cell_font = styles.Font(name='Calibri', bold=False, italic=False, color=font_color)
-                # Adjust x coordinate if we have row numbers
-                adjusted_x = x + 1 if include_row_numbers else x
-                cell_name = get_cell_name(adjusted_x, y)
-                ws[cell_name].alignment = cell_alignment
-                if include_pixel_numbers: ws[cell_name].value = cell_symbol
-                ws[cell_name].fill = cell_fill
-                ws[cell_name].border = cell_border
-                ws[cell_name].font = cell_font
-            # Set column width for the current column
-            col_letter = get_column(x + (2 if include_row_numbers else 1))
-            ws.column_dimensions[col_letter].width = column_size
-
-        # if including row numbers column, fill column to right of image with row numbers
-        if include_row_numbers:
-            col_num = len(colors) + 1
-            col_letter = get_column(col_num + 1)
-            #ws.column_dimensions[col_letter].width = column_size
-            for y in range(len(colors[0]) - 1, -1, -1):
-                cell_name = get_cell_name(col_num, y)
-                ws[cell_name].value = str(len(colors[0]) - y)  # Fill with descending numbers
-                ws[cell_name].alignment = styles.Alignment(horizontal='left')
-
-        # add legend (adjust the position to account for the row numbers column)
-        used_colors, used_map = get_used_color_palette(colors, color_map)
-        width = len(colors)
-        legend_start = width + (2 if include_row_numbers else 1)  # Adjust for row numbers column
-        for c in range(-1, len(used_colors)):
-            if(c == -1):
-                ws[get_cell_name(legend_start + legend_buffer, 0)].value = "Color"
-                ws[get_cell_name(legend_start + legend_buffer + 1, 0)].value = "HEX"
-                ws[get_cell_name(legend_start + legend_buffer + 2, 0)].value = "Red Value"
-                ws[get_cell_name(legend_start + legend_buffer + 3, 0)].value = "Green Value"
-                ws[get_cell_name(legend_start + legend_buffer + 4, 0)].value = "Blue Value"
-                continue        
-            color_rgb = used_colors[c]
-            color_symbol = used_map[c]
-            color_hex = rgb_to_hex(color_rgb)
-            font_color = get_font_color(color_rgb)
-            cell_font = styles.Font(color=font_color)
-            ws[get_cell_name(legend_start + legend_buffer, c + 1)].fill = styles.PatternFill(fill_type=cell_fill_type, start_color=color_hex, end_color=color_hex)
-            if include_pixel_numbers: ws[get_cell_name(legend_start + legend_buffer, c + 1)].value = str(color_symbol)
-            ws[get_cell_name(legend_start + legend_buffer, c + 1)].font = cell_font
-            ws[get_cell_name(legend_start + legend_buffer + 1, c + 1)].value = str(color_hex)
-            ws[get_cell_name(legend_start + legend_buffer + 2, c + 1)].value = str(color_rgb[0])
-            ws[get_cell_name(legend_start + legend_buffer + 3, c + 1)].value = str(color_rgb[1])
-            ws[get_cell_name(legend_start + legend_buffer + 4, c + 1)].value = str(color_rgb[2])
-
-        # save the file
-        check_output_directory()
-        output_directory = csv_output_directory
-        output_file_path = output_directory + "\\" + output_file_name + ".xlsx"
-        save_success = save_wb(wb, output_file_path)
-        if save_success:
-            print("Export complete!")
-            print(f"File '{output_file_name}.xlsx' created at location: '{output_file_path}'")
-        else:
-            print(output_file_name + " save failed")
-            messagebox.showinfo(error_box_header, "Error: Save failed. Make sure file '" + get_file_name_from_path(output_file_name) + "' is not already open on computer.")
-    except Exception as e:
-        print(f"Error during export: {str(e)}")
-        messagebox.showinfo(error_box_header, f"Error during export: {str(e)}")
-    finally:
-        if wb:
-            cleanup_workbook(wb)
-
-
-# Import a pattern from Excel, specifying the rectangular region by start_cell and end_cell (e.g., "B1", "BX75").
-def import_pattern_from_excel(start_cell, end_cell):
+    def set_error(message):
+        job["error"] = message
+
+    def run_export():
+        job["result"] = export_image_as_excel_pattern(csv_output_directory, output_file_name, image, include_pixel_numbers = include_pixel_numbers, include_row_numbers = include_row_numbers, progress = set_progress, cancel_event = job["cancel_event"], on_error = set_error)
+
+    job["thread"] = threading.Thread(target=run_export, name="excel-export", daemon=True)
+    export_job = job
+    show_export_progress(progress_widgets)
+    job["thread"].start()
+    app.after(export_poll_interval, poll_export)
+
+# runs on the Tk thread every export_poll_interval ms while an export is running
+def poll_export():
+    global export_job
+    job = export_job
+    progress_bar, cancel_button = job["widgets"]
+    done, total = job["progress"]
+    progress_bar.set(done / total if total else 0)
+    if job["thread"].is_alive():
+        app.after(export_poll_interval, poll_export)
+        return
+
+    export_job = None
+    hide_export_progress(job["widgets"])
+    if not job["result"] and not job["cancel_event"].is_set():
+        messagebox.showinfo(error_box_header, f"Error: Save failed. {job['error'] or 'See the console for details.'}")
+
+# stop the running export. it stops at its next row check and leaves no file behind
+def cancel_export():
+    if export_job == None: return
+    export_job["cancel_event"].set()
+
+def show_export_progress(progress_widgets):
+    progress_bar, cancel_button = progress_widgets
+    progress_bar.set(0)
+    progress_bar.grid()
+    cancel_button.grid()
+
+def hide_export_progress(progress_widgets):
+    for widget in progress_widgets:
+        widget.grid_remove()
+
+# progress bar and cancel button for exports started from a tab, hidden until an export runs
+def create_export_progress(parent, row):
+    progress_bar = ctk.CTkProgressBar(parent, mode="determinate")
+    progress_bar.grid(row=row, column=0, padx=5, pady=5, sticky="ew")
+    cancel_button = ctk.CTkButton(parent, text="Cancel", command=lambda: cancel_export())
+    cancel_button.grid(row=row, column=1, padx=5, pady=5)
+    progress_widgets = (progress_bar, cancel_button)
+    hide_export_progress(progress_widgets)
+    return progress_widgets
+
+# Prompt for an Excel file, then import a pattern from it, specifying the rectangular region by start_cell and end_cell (e.g., "B1", "BX75").
+def import_pattern(start_cell, end_cell):
     global image_lvl4
 
     # Prompt user to select Excel file
@@ -522,69 +454,60 @@ def import_pattern_from_excel(start_cell, end_cell):
         print("No file selected.")
         return None
 
-    try:
-        wb = load_workbook(filepath, data_only=True)
-        ws = wb.active
-
-        # Parse start and end cell coordinates
-        start_col_name, start_row = coordinate_from_string(start_cell.upper())
-        end_col_name, end_row = coordinate_from_string(end_cell.upper())
-        start_col = column_index_from_string(start_col_name)
-        end_col = column_index_from_string(end_col_name)
-        start_row = int(start_row)
-        end_row = int(end_row)
-
-        # Ensure correct order (top-left to bottom-right)
-        min_row, max_row = min(start_row, end_row), max(start_row, end_row)
-        min_col, max_col = min(start_col, end_col), max(start_col, end_col)
-
-        width = max_col - min_col + 1
-        height = max_row - min_row + 1
-
-        # Read cell colors and build pixel data
-        pixels = []
-        for row in range(min_row, max_row + 1):
-            row_pixels = []
-            for col in range(min_col, max_col + 1):
-                cell = ws.cell(row=row, column=col)
-                # Try to get the cell's fill color
-                fill = cell.fill
-                rgb = (255, 255, 255)  # default to white
-                if fill and fill.fill_type is not None and fill.start_color is not None:
-                    color = fill.start_color
-                    # openpyxl color can be indexed or rgb
-                    if color.type == "rgb" and color.rgb is not None:
-                        hexstr = color.rgb
-                        # openpyxl may return ARGB, so skip first two chars if length 8
-                        if len(hexstr) == 8:
-                            hexstr = hexstr[2:]
-                        try:
-                            rgb = tuple(int(hexstr[i:i+2], 16) for i in (0, 2, 4))
-                        except Exception:
-                            rgb = (255, 255, 255)
-                row_pixels.append(rgb)
-            pixels.append(row_pixels)
-
-        # Create image from pixel data
-        img = Image.new("RGB", (width, height))
-        for y in range(height):
-            for x in range(width):
-                img.putpixel((x, y), pixels[y][x])
-
-        # test import by replacing image_lvl0
-        image_lvl4 = img
-        update_image_display(image_lvl4, image_lvl4_image_label)
-        #update_all_levels_tab1()
-
-        print("Pattern imported from Excel successfully!")
-        print(f"File path: '{filepath}'")
-
-        return img
-
-    except Exception as e:
-        print(f"Error importing pattern from Excel: {e}")
-        return None
+    img = import_pattern_from_excel(filepath, start_cell, end_cell)
+    if img == None: return None
+
+    # test import by replacing image_lvl4
+    image_lvl4 = img
+    update_image_display(image_lvl4, image_lvl4_image_label)
+    #update_all_levels_tab1()
 
+    return img
+
+
+# turn stage stats recording on or off to match the stats tab checkboxes
+def update_stats_recording():
+    if record_stats_var.get():
+        enable_instrumentation(trace_memory = trace_memory_var.get())
+        print("Recording stage stats" + (" with memory tracing" if trace_memory_var.get() else ""))
+    else:
+        disable_instrumentation()
+        print("Stopped recording stage stats")
+    refresh_stats_panel()
+
+# IN: dict from get_stage_stats
+# OUT: text table, one line per stage
+def format_stage_stats(stage_stats):
+    if not stage_stats:
+        return "No stage stats recorded. Tick 'Record stage stats' and use the app."
+    lines = [f"{'stage':<22}{'calls':>7}{'total ms':>11}{'mean ms':>10}{'max ms':>10}{'last ms':>10}{'peak KB':>11}"]
+    for name, stats in stage_stats.items():
+        peak = f"{stats['peak_bytes'] / 1024:.0f}" if stats["peak_bytes"] != None else "-"
+        lines.append(f"{name:<22}{stats['calls']:>7}{stats['total_seconds'] * 1000:>11.1f}{stats['mean_seconds'] * 1000:>10.2f}"
+                     f"{stats['max_seconds'] * 1000:>10.2f}{stats['last_seconds'] * 1000:>10.2f}{peak:>11}")
+    return "\n".join(lines)
+
+def refresh_stats_panel():
+    stats_text_box.configure(state="normal")
+    stats_text_box.delete("1.0", "end")
+    stats_text_box.insert("end", format_stage_stats(get_stage_stats()))
+    stats_text_box.configure(state="disabled")
+
+# runs on the Tk thread every stats_refresh_interval ms, refreshing the stats panel while stats are recorded
+def poll_stats():
+    if record_stats_var.get():
+        refresh_stats_panel()
+    app.after(stats_refresh_interval, poll_stats)
+
+def reset_stats():
+    reset_stage_stats()
+    refresh_stats_panel()
+
+def save_stats():
+    filepath = filedialog.asksaveasfilename(defaultextension=".json", filetypes=[("JSON files", "*.json")])
+    if not filepath: return
+    if dump_stage_stats(filepath):
+        print(f"Stage stats saved to: '{filepath}'")
 
 
 # ---------- GUI Setup ----------
@@ -617,6 +540,11 @@ tab_1 = tabview.add("Pixel Shift")
 tab_1.grid_rowconfigure(0, weight=1)
 tab_1.grid_columnconfigure(0, weight=1)
 
+# Add tab 2
+tab_2 = tabview.add("Stats")
+tab_2.grid_rowconfigure(0, weight=1)
+tab_2.grid_columnconfigure(0, weight=1)
+
 # ---------- Tab 0 : UI Frame Structure ----------
 
 frame_app_tab0 = ctk.CTkFrame(tab_0)
@@ -685,7 +613,8 @@ console_text_box.grid(row=1, column=0, padx=5, pady=5, sticky="nsew")
 
 # add new console text box to list, then redirect stdout to all boxes in the list
 console_box_list.append(console_text_box)
-sys.stdout = MultiTextBoxRedirector(console_box_list)
+console_sink = QueuedConsoleSink(console_box_list)
+sys.stdout = console_sink
 
 # ---------- Tab 0 Frame: col1 ----------
 
@@ -800,13 +729,41 @@ def create_entry(label_text, default_text, row):
     entry = ctk.CTkEntry(frame_entry)
     entry.insert(0, default_text)
     entry.grid(row=row, column=1, pady=5, padx=5)
-    entry.bind('<Return>', lambda e: update_all_levels()) # update images when user presses Enter
-    entry.bind('<FocusOut>', lambda e: update_all_levels()) # update images when user leaves text box
+    entry.bind('<Return>', lambda e: on_entry_changed()) # update images when user presses Enter
+    entry.bind('<FocusOut>', lambda e: on_entry_changed()) # update images when user leaves text box
     return entry
 
 width_entry = create_entry("Width (# of stitches)", "75", 0)
-height_entry = create_entry("Height (# of stitches)", "75", 1)
-colors_entry = create_entry("Number of Colors", "3", 2)
+height_entry = create_entry("Height (# of rows)", "75", 1)
+# gauge of the yarn and hook: stitches and rows per 10 cm (see core/gauge.py)
+gauge_stitches_entry = create_entry("Gauge (stitches / 10 cm)", str(default_gauge_stitches), 2)
+gauge_rows_entry = create_entry("Gauge (rows / 10 cm)", str(default_gauge_rows), 3)
+
+# keep the finished piece in the proportions of the image: editing the width or height sets the other one
+keep_proportions_var = ctk.BooleanVar(value=True)
+checkbox_keep_proportions = ctk.CTkCheckBox(frame_entry, text="Keep image proportions", variable=keep_proportions_var, command=lambda: on_keep_proportions_changed())
+checkbox_keep_proportions.grid(row=4, column=0, columnspan=2, padx=5, pady=5, sticky="w")
+
+colors_entry = create_entry("Number of Colors", "3", 5)
+
+# quantizer used to reduce the colors (see core/quantizers.py)
+quantizer_label = ctk.CTkLabel(frame_entry, text="Quantizer")
+quantizer_label.grid(row=6, column=0, padx=5, pady=5, sticky="w")
+quantizer_menu = ctk.CTkOptionMenu(frame_entry, values=list(quantizers), command=lambda v: update_all_levels())
+quantizer_menu.set(default_quantizer)
+quantizer_menu.grid(row=6, column=1, pady=5, padx=5)
+
+# how each stitch's color is taken from the image (see core/pixelate.py)
+pixelation_label = ctk.CTkLabel(frame_entry, text="Pixelation")
+pixelation_label.grid(row=7, column=0, padx=5, pady=5, sticky="w")
+pixelation_menu = ctk.CTkOptionMenu(frame_entry, values=list(pixelation_methods), command=lambda v: update_all_levels())
+pixelation_menu.set(default_pixelation_method)
+pixelation_menu.grid(row=7, column=1, pady=5, padx=5)
+
+# replace the pattern colors with the closest colors from the DMC chart (color_chart.xlsx)
+use_yarn_colors_var = ctk.BooleanVar()
+checkbox_use_yarn_colors = ctk.CTkCheckBox(frame_entry, text="Use DMC color palette", variable=use_yarn_colors_var, command=lambda: update_all_levels())
+checkbox_use_yarn_colors.grid(row=8, column=0, columnspan=2, padx=5, pady=5, sticky="w")
 
 # ---------- Tab 0 Frame: Export to Excel ----------
 
@@ -821,7 +778,7 @@ frame_tab0_export_pattern.grid_rowconfigure(0, weight=1) # set row 0 to expandab
 frame_tab0_export_pattern.grid_columnconfigure(0, weight=1) # set column 0 to expandable
 
 # export to excel button
-export_image_as_pattern_button = ctk.CTkButton(frame_tab0_export_pattern, text="Export Pattern to Excel", command = lambda: export_image_as_excel_pattern(csv_output_directory, "output", image_lvl3, include_pixel_numbers = include_cells_var_tab0.get(), include_row_numbers = include_rownums_var_tab0.get()))
+export_image_as_pattern_button = ctk.CTkButton(frame_tab0_export_pattern, text="Export Pattern to Excel", command = lambda: export_pattern("output", image_lvl3, export_progress_tab0, include_pixel_numbers = include_cells_var_tab0.get(), include_row_numbers = include_rownums_var_tab0.get()))
 export_image_as_pattern_button.grid(row=0, column=0, padx=5, pady=5)
 
 # frame for controls
@@ -840,6 +797,9 @@ include_rownums_var_tab0 = ctk.BooleanVar()
 checkbox_include_rownums = ctk.CTkCheckBox(frame_tab0_export_controls, text="Include row numbers", variable=include_rownums_var_tab0)
 checkbox_include_rownums.grid(row=1, column=0, padx=5, pady=5, sticky="nsw")
 
+# export progress bar and cancel button
+export_progress_tab0 = create_export_progress(frame_tab0_export_pattern, 1)
+
 
 # ---------- Tab 1: UI Frame Structure ----------
 
@@ -896,7 +856,7 @@ frame_load_pattern_controls.grid_rowconfigure(0, weight=1) # set row 0 to expand
 frame_load_pattern_controls.grid_columnconfigure(0, weight=1) # set column 0 to expandable
 
 # load pattern from excel button
-load_pattern_button = ctk.CTkButton(frame_load_pattern_controls, text="Import pattern from Excel", command = lambda: import_pattern_from_excel(excel_pattern_start_cell.get(), excel_pattern_end_cell.get()))
+load_pattern_button = ctk.CTkButton(frame_load_pattern_controls, text="Import pattern from Excel", command = lambda: import_pattern(excel_pattern_start_cell.get(), excel_pattern_end_cell.get()))
 load_pattern_button.grid(row=0, column=0, columnspan=2, padx=5, pady=5)
 
 def create_load_pattern_config_entry(label_text, default_text, row):
@@ -922,9 +882,8 @@ console_text_label_tab1.grid(row=0, column=0, padx=5, pady=5, sticky="ew")
 console_text_box_tab1 = ctk.CTkTextbox(frame_tab1_console, state="disabled")
 console_text_box_tab1.grid(row=1, column=0, padx=5, pady=5, sticky="nsew")
 
-# add new console text box to list, then redirect stdout to all boxes in the list
-console_box_list.append(console_text_box_tab1)
-sys.stdout = MultiTextBoxRedirector(console_box_list)
+# add new console text box to the list the console sink writes to
+console_sink.add_textbox(console_text_box_tab1)
 
 # ---------- Tab 1 Frame: col1 ----------
 
@@ -956,7 +915,7 @@ frame_pixel_shift_controls.grid_rowconfigure(0, weight=1) # set row 0 to expanda
 frame_pixel_shift_controls.grid_columnconfigure(0, weight=1) # set column 0 to expandable
 
 # pixel shift button
-load_pattern_button = ctk.CTkButton(frame_pixel_shift_controls, text="Perform pixel shift", command = lambda: pixel_shift())
+load_pattern_button = ctk.CTkButton(frame_pixel_shift_controls, text="Perform pixel shift", command = lambda: process_lvl4_to_lvl5())
 load_pattern_button.grid(row=0, column=0, columnspan=2, padx=5, pady=5)
 
 # checkbox: some checkbox
@@ -988,7 +947,7 @@ frame_tab1_export_pattern.grid_rowconfigure(0, weight=1) # set row 0 to expandab
 frame_tab1_export_pattern.grid_columnconfigure(0, weight=1) # set column 0 to expandable
 
 # export to excel button
-export_image_as_pattern_button = ctk.CTkButton(frame_tab1_export_pattern, text="Export Pattern to Excel", command = lambda: export_image_as_excel_pattern(csv_output_directory, "output - shifted", image_lvl5, include_pixel_numbers = include_cells_var_tab1.get(), include_row_numbers = include_rownums_var_tab1.get()))
+export_image_as_pattern_button = ctk.CTkButton(frame_tab1_export_pattern, text="Export Pattern to Excel", command = lambda: export_pattern("output - shifted", image_lvl5, export_progress_tab1, include_pixel_numbers = include_cells_var_tab1.get(), include_row_numbers = include_rownums_var_tab1.get()))
 export_image_as_pattern_button.grid(row=0, column=0, padx=5, pady=5)
 
 # frame for controls
@@ -1007,6 +966,52 @@ include_rownums_var_tab1 = ctk.BooleanVar(value=True)
 checkbox_include_rownums = ctk.CTkCheckBox(frame_tab1_export_controls, text="Include row numbers", variable=include_rownums_var_tab1)
 checkbox_include_rownums.grid(row=1, column=0, padx=5, pady=5, sticky="nsw")
 
+# export progress bar and cancel button
+export_progress_tab1 = create_export_progress(frame_tab1_export_pattern, 1)
+
+# ---------- Tab 2 : Stats ----------
+
+frame_app_tab2 = ctk.CTkFrame(tab_2)
+frame_app_tab2.grid(row=0, column=0, padx=5, pady=5, sticky="nsew")
+frame_app_tab2.grid_rowconfigure(1, weight=1) # set row 1 (stats table) to expandable
+frame_app_tab2.grid_columnconfigure(0, weight=1) # set column 0 to expandable
+
+# frame for stats controls
+frame_stats_controls = ctk.CTkFrame(frame_app_tab2, fg_color="transparent")
+frame_stats_controls.grid(row=0, column=0, padx=5, pady=5, sticky="nsw")
+
+# checkbox: record stage stats (off by default, instrumented stages cost almost nothing while off)
+record_stats_var = ctk.BooleanVar()
+checkbox_record_stats = ctk.CTkCheckBox(frame_stats_controls, text="Record stage stats", variable=record_stats_var, command=lambda: update_stats_recording())
+checkbox_record_stats.grid(row=0, column=0, padx=5, pady=5, sticky="w")
+
+# checkbox: also record peak memory with tracemalloc (slow)
+trace_memory_var = ctk.BooleanVar()
+checkbox_trace_memory = ctk.CTkCheckBox(frame_stats_controls, text="Track peak memory (slow)", variable=trace_memory_var, command=lambda: update_stats_recording() if record_stats_var.get() else None)
+checkbox_trace_memory.grid(row=0, column=1, padx=5, pady=5, sticky="w")
+
+# buttons
+reset_stats_button = ctk.CTkButton(frame_stats_controls, text="Reset", command=lambda: reset_stats())
+reset_stats_button.grid(row=0, column=2, padx=5, pady=5)
+save_stats_button = ctk.CTkButton(frame_stats_controls, text="Save as JSON", command=lambda: save_stats())
+save_stats_button.grid(row=0, column=3, padx=5, pady=5)
+
+# stats table
+stats_text_box = ctk.CTkTextbox(frame_app_tab2, state="disabled", font=("Courier New", 13))
+stats_text_box.grid(row=1, column=0, padx=5, pady=5, sticky="nsew")
+
+
+# runs on the Tk thread every console_flush_interval ms and shows everything printed since the last run
+def flush_console():
+    console_sink.flush_to_textboxes()
+    app.after(console_flush_interval, flush_console)
 
 # ---------- Launch ----------
-app.mainloop()
+def main():
+    app.after(pipeline_poll_interval, poll_pipeline_results)
+    app.after(console_flush_interval, flush_console)
+    app.after(stats_refresh_interval, poll_stats)
+    app.mainloop()
+
+if __name__ == "__main__":
+    main()